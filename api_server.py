@@ -0,0 +1,244 @@
+import os
+import json
+import gzip
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Read-only JSON API over the pipeline outputs, for teams that used to scrape the dashboard.
+JSON_ENDPOINTS = {
+    '/insights': 'insights.json',
+    '/d2c/insights': os.path.join('phase5_extension', 'd2c_insights.json'),
+    '/d2c/creative': os.path.join('phase5_extension', 'd2c_creative_outputs.json'),
+}
+APPS_PATH = os.path.join('data', 'processed', 'combined_market_data.csv')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MIN_GZIP_BYTES = 1024
+MAX_CACHED_QUERIES = 512
+
+
+class DataUnavailable(Exception):
+    """An output file exists but cannot be read yet (corrupt or half-written)."""
+
+
+class Response:
+    """A ready-to-send body with its ETag and a lazily built gzip variant (which has its own ETag)."""
+
+    def __init__(self, body):
+        self.body = body
+        digest = hashlib.sha1(body).hexdigest()[:20]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+        self._gzipped = None
+
+    @property
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header (a list of tags or '*') against our ETag."""
+    if not if_none_match:
+        return False
+    opaque = lambda tag: tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip()
+    return any(tag.strip() == '*' or opaque(tag) == opaque(etag) for tag in if_none_match.split(','))
+
+
+class FileCache:
+    """
+    In-process cache of parsed output files. Each lookup costs one stat();
+    an entry is rebuilt only when the file's mtime or size changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._queries = OrderedDict()
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, path, build):
+        """Returns (signature, value) with value = build(path), or (None, None) if the file is missing."""
+        signature = self._signature(path)
+        if signature is None:
+            return None, None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == signature:
+                return entry
+        value = build(path)
+        with self._lock:
+            self._entries[path] = (signature, value)
+        return signature, value
+
+    def get_query(self, key, build):
+        """Small LRU of rendered responses for repeated /apps queries."""
+        with self._lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+        value = build()
+        with self._lock:
+            self._queries[key] = value
+            while len(self._queries) > MAX_CACHED_QUERIES:
+                self._queries.popitem(last=False)
+        return value
+
+
+CACHE = FileCache()
+
+
+def _json_file_response(path):
+    try:
+        with open(path, 'rb') as f:
+            data = json.load(f)
+    except (ValueError, FileNotFoundError) as e:
+        # A server-side data problem, not a bad request
+        raise DataUnavailable(f"could not read '{path}': {e}") from e
+    # Re-serialize compactly; the pipeline writes indented JSON
+    return Response(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+
+def _load_apps(path):
+    try:
+        df = pd.read_csv(path)
+    except (ValueError, FileNotFoundError) as e:
+        raise DataUnavailable(f"could not read '{path}': {e}") from e
+    # Lower-cased copies for case-insensitive filters, computed once per file version
+    df['_platform'] = df['Platform'].str.lower()
+    df['_category'] = df['Category'].astype(str).str.lower()
+    df['_app'] = df['App'].astype(str).str.lower()
+    return df
+
+
+def _apps_response(df, params):
+    """Filters and paginates the combined market data. Raises ValueError on bad parameters."""
+    page = int(params.get('page', 1))
+    page_size = int(params.get('page_size', DEFAULT_PAGE_SIZE))
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+
+    mask = pd.Series(True, index=df.index)
+    if 'platform' in params:
+        mask &= df['_platform'] == params['platform'].lower()
+    if 'category' in params:
+        mask &= df['_category'] == params['category'].lower()
+    if 'min_rating' in params:
+        mask &= df['Rating'] >= float(params['min_rating'])
+    if 'q' in params:
+        mask &= df['_app'].str.contains(params['q'].lower(), regex=False)
+    result = df[mask]
+
+    if 'sort' in params:
+        column = params['sort'].lstrip('-')
+        if column not in ('App', 'Category', 'Rating', 'Reviews', 'Price', 'Installs'):
+            raise ValueError(f"cannot sort by '{column}'")
+        result = result.sort_values(by=column, ascending=not params['sort'].startswith('-'))
+
+    items = result.iloc[(page - 1) * page_size: page * page_size].drop(columns=['_platform', '_category', '_app'])
+    body = (
+        f'{{"page":{page},"page_size":{page_size},"total":{len(result)},'
+        f'"items":{items.to_json(orient="records")}}}'
+    )
+    return Response(body.encode('utf-8'))
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse connections
+    server_version = 'MarketIntelAPI/1.0'
+    # Send headers and body in one segment instead of waiting on delayed ACKs
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            if url.path in JSON_ENDPOINTS:
+                _, response = CACHE.get(JSON_ENDPOINTS[url.path], _json_file_response)
+            elif url.path == '/apps':
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                signature, df = CACHE.get(APPS_PATH, _load_apps)
+                response = None if df is None else CACHE.get_query(
+                    (signature, tuple(sorted(params.items()))), lambda: _apps_response(df, params)
+                )
+            elif url.path == '/health':
+                response = Response(b'{"status":"ok"}')
+            else:
+                self._send_error(404, f"unknown endpoint '{url.path}'")
+                return
+        except DataUnavailable as e:
+            self._send_error(503, str(e))
+            return
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+
+        if response is None:
+            self._send_error(503, "data not generated yet; run the pipeline scripts first")
+            return
+        self._send(response)
+
+    def _send(self, response):
+        use_gzip = len(response.body) >= MIN_GZIP_BYTES and 'gzip' in self.headers.get('Accept-Encoding', '')
+        etag = response.gzip_etag if use_gzip else response.etag
+
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = response.gzipped if use_gzip else response.body
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        body = json.dumps({"error": message}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Read-only HTTP API for insights and market data.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--verbose', action='store_true', help="Log every request.")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), APIHandler)
+    server.daemon_threads = True
+    server.verbose = args.verbose
+    print(f"--- Serving /insights, /d2c/insights, /d2c/creative and /apps on http://{args.host}:{args.port} ---")
+    server.serve_forever()
@@ -1,7 +1,15 @@
 import streamlit as st
-import json
 import pandas as pd
 import os
+import sys
+
+# Pipeline helpers (natural-language query engine, version marker) live in scripts/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+import nl_query
+import dashboard_bundle
+from publish import file_hash, read_versions, version_key
+
+VERSION_POLL_SECONDS = 30
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -11,42 +19,85 @@ st.set_page_config(
 )
 
 # --- Data Loading Functions ---
-@st.cache_data # Cache the data for performance
-def load_all_data():
-    # Phase 1-4 Data
-    insights_path = 'insights.json'
-    combined_data_path = 'data/processed/combined_market_data.csv'
-    
-    insights_data = None
-    if os.path.exists(insights_path):
-        with open(insights_path, 'r', encoding='utf-8') as f:
-            insights_data = json.load(f)
-            
-    combined_df = pd.read_csv(combined_data_path) if os.path.exists(combined_data_path) else None
-
-    # Phase 5 Data
-    d2c_insights_path = 'phase5_extension/d2c_insights.json'
-    d2c_creative_path = 'phase5_extension/d2c_creative_outputs.json'
-
-    d2c_insights = None
-    if os.path.exists(d2c_insights_path):
-        with open(d2c_insights_path, 'r') as f:
-            d2c_insights = json.load(f)
-
-    d2c_creative = None
-    if os.path.exists(d2c_creative_path):
-        with open(d2c_creative_path, 'r') as f:
-            d2c_creative = json.load(f)
-            
-    return insights_data, combined_df, d2c_insights, d2c_creative
+@st.cache_data(max_entries=64)
+def content_hash(path, mtime):
+    # Hashed once per modification time; a rewrite with the same bytes gives the same key
+    return file_hash(path)
+
+def file_version(path, versions):
+    """
+    Cache key for one output file: its content hash from the scheduler's
+    version marker, or hashed here if the file was written after it was last
+    published (e.g. by a manual run or a same-content rewrite). None if it is missing.
+    """
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    entry = versions['files'].get(version_key(path))
+    if entry and entry['published_at'] >= mtime:
+        return entry['hash']
+    return content_hash(path, mtime)
+
+@st.cache_resource(max_entries=1)
+def load_dashboard(version):
+    # The prebuilt bundle in one read, shared by all sessions (treat it as read-only).
+    # It is rebuilt here if missing, from another schema version or built from other source contents.
+    bundle = dashboard_bundle.read_bundle() or dashboard_bundle.build_bundle()
+    return bundle, dashboard_bundle.market_dataframe(bundle)
+
+def dashboard_version(versions):
+    paths = [dashboard_bundle.BUNDLE_PATH] + dashboard_bundle.SOURCE_PATHS
+    return tuple(file_version(path, versions) for path in paths)
+
+TREND_SOURCES = [('google_play', 'Android'), ('ios', 'iOS')]
+
+def trend_summary_path(source):
+    return os.path.join('data', 'history', f'source={source}', 'summary.parquet')
+
+@st.cache_data(max_entries=2)
+def load_trend_summaries(version):
+    # One small summary row per snapshot, so trends never read the full history
+    summaries = {}
+    for source, label in TREND_SOURCES:
+        summary_path = trend_summary_path(source)
+        if os.path.exists(summary_path):
+            summaries[label] = pd.read_parquet(summary_path)
+    return summaries
+
+@st.cache_resource(max_entries=1)
+def load_query_engine(version):
+    # In-memory, read-only SQLite copy of the processed tables plus the schema sent to the LLM
+    tables = nl_query.load_tables()
+    if not tables:
+        return None, None, None
+    return nl_query.build_database(tables), tables, nl_query.describe_schema(tables)
+
+def query_engine_version(versions):
+    paths = list(nl_query.TABLE_SOURCES.values()) + [nl_query.D2C_STORE_PATH]
+    return tuple(file_version(path, versions) for path in paths)
+
+@st.fragment(run_every=VERSION_POLL_SECONDS)
+def watch_for_updates():
+    # Polls only the small version marker; a new generation reruns the app, which reloads the changed files
+    generation = read_versions()['generation']
+    if st.session_state.setdefault('data_generation', generation) != generation:
+        st.session_state['data_generation'] = generation
+        st.rerun()
+    st.caption(f"Data generation {generation}")
 
 # Load all potential data
-app_insights, combined_df, d2c_insights, d2c_creative = load_all_data()
+data_versions = read_versions()
+dashboard, combined_df = load_dashboard(dashboard_version(data_versions))
+app_insights, d2c = dashboard['insights'], dashboard['d2c']
+trend_summaries = load_trend_summaries(tuple(file_version(trend_summary_path(source), data_versions)
+                                             for source, _ in TREND_SOURCES))
 
 # --- Sidebar Navigation ---
 st.sidebar.title("Dashboard Navigation")
 st.sidebar.info("Select which analysis you would like to view.")
-page = st.sidebar.radio("Choose a section:", ["App Market Intelligence", "D2C Marketing Extension"])
+page = st.sidebar.radio("Choose a section:", ["App Market Intelligence", "D2C Marketing Extension", "Ask the Data"])
+with st.sidebar:
+    watch_for_updates()
 
 
 # --- Main Page Content ---
@@ -55,19 +106,34 @@ if page == "App Market Intelligence":
     st.title("📊 App Market Intelligence Dashboard (Phases 1-4)")
     st.markdown("An automated analysis of the top 100 Android and iOS mobile applications.")
 
+    # Summary stats come preformatted from the dashboard bundle
+    for segment, stats in (dashboard['market_stats'] or {}).items():
+        st.caption(segment)
+        for column, (label, value) in zip(st.columns(len(stats)), stats.items()):
+            column.metric(label, value)
+
     if app_insights:
         st.markdown("---")
         st.header("💡 Key Strategic Insights")
         for insight in app_insights:
             st.subheader(insight['title'])
             st.metric(label="Insight Type", value=insight['insight_type'])
-            st.info(f"**Summary:** {insight['summary']}")
-            st.warning(f"**Recommendation:** {insight['recommendation']}")
-            st.progress(insight['confidence_score'], text=f"Confidence: {int(insight['confidence_score']*100)}%")
+            st.info(insight['summary_md'])
+            st.warning(insight['recommendation_md'])
+            st.progress(insight['confidence'], text=insight['confidence_text'])
             with st.expander("Show Supporting Data"):
                 st.json(insight['supporting_data'])
     else:
         st.error("Could not find 'insights.json'. Please run the Phase 3 script.")
+
+    if trend_summaries:
+        st.markdown("---")
+        st.header("📈 Market Trends Across Snapshots")
+        metric = st.selectbox("Metric:", ["mean_rating", "total_reviews", "total_installs", "apps", "paid_share"])
+        trend_df = pd.concat(
+            {label: summary.set_index('snapshot_time')[metric] for label, summary in trend_summaries.items()}, axis=1
+        )
+        st.line_chart(trend_df)
         
     if st.checkbox("Show Combined App Market Raw Data"):
         if combined_df is not None:
@@ -79,23 +145,42 @@ elif page == "D2C Marketing Extension":
     st.title("🚀 D2C Marketing Extension (Phase 5)")
     st.markdown("An analysis of D2C campaign data and AI-generated creative content.")
 
-    if d2c_insights and d2c_creative:
+    if d2c:
         st.markdown("---")
         st.header("📈 Key D2C Insights")
         
         # Display D2C Insights
-        roas_insight = d2c_insights['best_roas_campaign']
-        seo_insight = d2c_insights['top_seo_opportunity']
-        st.success(f"**Best Campaign:** '{roas_insight['id']}' on {roas_insight['channel']} had a massive ROAS of **{roas_insight['roas']}**.")
-        st.info(f"**Top SEO Opportunity:** The category '{seo_insight['category']}' has high search volume but a low ranking, making it a prime target for growth.")
+        st.success(d2c['best_campaign_md'])
+        st.info(d2c['seo_opportunity_md'])
         
         st.markdown("---")
         st.header("🤖 AI-Generated Creative Content")
 
         st.subheader("Generated Ad Headlines")
-        st.markdown(d2c_creative['ad_headlines'].replace('\n', '\n\n'))
+        st.markdown(d2c['ad_headlines_md'])
         
         st.subheader("Generated SEO Meta Description")
-        st.markdown(d2c_creative['seo_description'])
+        st.markdown(d2c['seo_description_md'])
+    else:
+        st.error("Could not find Phase 5 output files. Please run both Phase 5 scripts first.")
+
+elif page == "Ask the Data":
+    st.title("🔎 Ask the Data")
+    st.markdown("Ask a question in plain English. The LLM only sees the table schema and column statistics; "
+                "the SQL it writes is validated and run locally over the processed tables.")
+
+    query_conn, query_tables, query_schema = load_query_engine(query_engine_version(data_versions))
+    if query_conn is None:
+        st.error("Could not find any processed tables. Please run the Phase 1-2 scripts first.")
     else:
-        st.error("Could not find Phase 5 output files. Please run both Phase 5 scripts first.")
\ No newline at end of file
+        with st.expander("Show Tables and Schema"):
+            st.code(query_schema)
+        question = st.text_input("Your question:", placeholder="Which 5 iOS apps have the most reviews?")
+        if st.button("Ask") and question:
+            try:
+                with st.spinner("Writing SQL..."):
+                    sql, result = nl_query.answer_question(question, query_conn, query_tables, query_schema)
+                st.code(sql, language="sql")
+                st.dataframe(result)
+            except Exception as e:
+                st.error(f"Could not answer the question: {e}")
@@ -1,6 +1,14 @@
 import pandas as pd
 import os
-import json
+import sys
+from d2c_kpi_store import D2CKPIStore, read_new_rows
+
+# Shared helpers (atomic publishing) live next to the Phase 1-4 scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from publish import write_json_atomic
+
+DATA_PATH = os.path.join('phase5_extension', 'Kasparro_Phase5_D2C_Synthetic_Dataset.xlsx')
+INSIGHTS_OUTPUT_PATH = os.path.join('phase5_extension', 'd2c_insights.json')
 
 def analyze_d2c_data():
     """
@@ -9,8 +17,7 @@ def analyze_d2c_data():
     """
     print("--- Starting Phase 5: D2C Funnel & SEO Analysis ---")
 
-    data_path = os.path.join('phase5_extension', 'Kasparro_Phase5_D2C_Synthetic_Dataset.xlsx')
-    df = pd.read_excel(data_path)
+    df = pd.read_excel(DATA_PATH)
     print("Successfully loaded D2C dataset from Excel file.")
 
     # Calculations
@@ -42,11 +49,60 @@ def analyze_d2c_data():
         }
     }
 
-    insights_output_path = os.path.join('phase5_extension', 'd2c_insights.json')
-    with open(insights_output_path, 'w') as f:
-        json.dump(insights_to_save, f, indent=4)
+    write_json_atomic(INSIGHTS_OUTPUT_PATH, insights_to_save, indent=4)
     
-    print(f"\n--- Analysis complete. Key insights saved to '{insights_output_path}' ---")
+    print(f"\n--- Analysis complete. Key insights saved to '{INSIGHTS_OUTPUT_PATH}' ---")
+
+def refresh_d2c_kpis(data_path=DATA_PATH, rebuild=False):
+    """
+    Incremental version of analyze_d2c_data() for append-only campaign data.
+    Folds only the rows added since the last refresh into the KPI store and
+    writes d2c_insights.json from its running aggregates and top-k heaps.
+    """
+    print("--- Starting Phase 5: Incremental D2C KPI Refresh ---")
+
+    store = D2CKPIStore()
+    if rebuild:
+        print("Rebuilding the KPI store from scratch.")
+        store.reset()
+
+    new_rows = read_new_rows(data_path, store.watermark)
+    added = store.ingest(new_rows)
+    print(f"Folded {added} new rows into the KPI store (watermark is now {store.watermark}).")
+
+    top_roas = store.top_roas()
+    top_seo = store.top_seo_opportunities()
+    if not top_roas or not top_seo:
+        print("Not enough data in the KPI store yet. Exiting.")
+        return
+
+    best_roas_campaign, best_seo_opportunity = top_roas[0], top_seo[0]
+    print("\n--- 💡 Key Business Insights ---")
+    print(f"\n🏆 Best ROAS Campaign: '{best_roas_campaign['id']}' (ROAS: {best_roas_campaign['roas']})")
+    print(f"📈 Top SEO Opportunity: '{best_seo_opportunity['category']}' (Volume: {best_seo_opportunity['search_volume']}, Position: {best_seo_opportunity['avg_position']})")
+
+    insights_to_save = {
+        "best_roas_campaign": {
+            "id": best_roas_campaign['id'],
+            "roas": best_roas_campaign['roas'],
+            "revenue": best_roas_campaign['revenue'],
+            "spend": best_roas_campaign['spend'],
+            "channel": best_roas_campaign['channel']
+        },
+        "top_seo_opportunity": best_seo_opportunity,
+        "top_roas_campaigns": top_roas,
+        "top_seo_opportunities": top_seo,
+        "channel_summary": store.channel_summary(),
+        "campaign_cac": store.campaign_cac()
+    }
+
+    write_json_atomic(INSIGHTS_OUTPUT_PATH, insights_to_save, indent=4)
+
+    print(f"\n--- Refresh complete. Key insights saved to '{INSIGHTS_OUTPUT_PATH}' ---")
 
 if __name__ == '__main__':
-    analyze_d2c_data()
\ No newline at end of file
+    # --incremental folds only newly appended rows into the KPI store; add --rebuild to start over
+    if '--incremental' in sys.argv:
+        refresh_d2c_kpis(rebuild='--rebuild' in sys.argv)
+    else:
+        analyze_d2c_data()
\ No newline at end of file
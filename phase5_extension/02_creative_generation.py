@@ -1,15 +1,18 @@
 import os
+import sys
 import json
-from openai import OpenAI
 from dotenv import load_dotenv
 
+# Shared helpers (LLM router) live next to the Phase 1-4 scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from llm_router import get_router
+from publish import write_json_atomic
+
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not found in .env file.")
 
-client = OpenAI(api_key=GROQ_API_KEY, base_url="https://api.groq.com/openai/v1")
-
 def generate_creative_content():
     """
     Uses insights from our D2C analysis to prompt an LLM for creative
@@ -36,9 +39,8 @@ def generate_creative_content():
     ad_headline_prompt = f"You are an expert copywriter. Based on the following insight, write 3 catchy ad headlines for {best_campaign['channel']}.\n\nInsight: {best_campaign_insight}"
     
     try:
-        # FIXED: Updated model name
-        response = client.chat.completions.create(model="openai/gpt-oss-120b", messages=[{"role": "user", "content": ad_headline_prompt}], temperature=0.8, max_tokens=200)
-        ad_headlines = response.choices[0].message.content
+        # Routed to a small, fast model with hedging (see scripts/llm_router.py)
+        ad_headlines = get_router().complete("ad_headlines", [{"role": "user", "content": ad_headline_prompt}], temperature=0.8, max_tokens=200)
         print("--- Generated Ad Headlines ---")
         print(ad_headlines)
     except Exception as e:
@@ -49,16 +51,13 @@ def generate_creative_content():
     seo_prompt = f"You are an expert SEO copywriter. Based on this insight, write an SEO meta description for the '{seo_opportunity['category']}' category, under 160 characters.\n\nInsight: {seo_opportunity_insight}"
     
     try:
-        # FIXED: Updated model name
-        response = client.chat.completions.create(model="openai/gpt-oss-120b", messages=[{"role": "user", "content": seo_prompt}], temperature=0.7, max_tokens=100)
-        seo_description = response.choices[0].message.content
+        seo_description = get_router().complete("seo_description", [{"role": "user", "content": seo_prompt}], temperature=0.7, max_tokens=100)
         print("\n--- Generated SEO Meta Description ---")
         print(seo_description)
         
         # Save creative outputs to a file for the Streamlit app
         creative_outputs = {"ad_headlines": ad_headlines, "seo_description": seo_description}
-        with open(os.path.join('phase5_extension', 'd2c_creative_outputs.json'), 'w') as f:
-            json.dump(creative_outputs, f, indent=4)
+        write_json_atomic(os.path.join('phase5_extension', 'd2c_creative_outputs.json'), creative_outputs, indent=4)
 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -0,0 +1,234 @@
+import sqlite3
+import heapq
+import json
+import os
+import pandas as pd
+from contextlib import contextmanager
+
+STORE_PATH = os.path.join('phase5_extension', 'd2c_kpi_store.sqlite')
+TOP_K = 10
+# Candidate names for the day column; without one, all rows share a single day bucket
+DAY_COLUMNS = ('date', 'day', 'event_date')
+
+
+def _day_column(df):
+    for column in DAY_COLUMNS:
+        if column in df.columns:
+            return column
+    return None
+
+
+def _roas(revenue, spend):
+    # Same convention as analyze_d2c_data(): zero spend counts as 1
+    return round(revenue / (spend if spend != 0 else 1), 2)
+
+
+def _cac(spend, first_purchases):
+    return round(spend / (first_purchases if first_purchases != 0 else 1), 2)
+
+
+class D2CKPIStore:
+    """
+    Running KPI aggregates for the append-only D2C campaign data.
+
+    Revenue, spend and first purchases are summed per (campaign, channel, day),
+    per (campaign, channel) and per channel. Each refresh folds in only the rows
+    past the stored watermark, and min-heaps of size TOP_K keep the best ROAS
+    keys and the biggest SEO opportunities current, so a refresh costs
+    O(new rows) instead of O(history).
+    """
+
+    def __init__(self, path=STORE_PATH, top_k=TOP_K):
+        self.path = path
+        self.top_k = top_k
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS daily_kpis (
+                    campaign_id TEXT, channel TEXT, day TEXT,
+                    revenue REAL NOT NULL, spend REAL NOT NULL, first_purchases REAL NOT NULL,
+                    PRIMARY KEY (campaign_id, channel, day)
+                );
+                CREATE TABLE IF NOT EXISTS campaign_totals (
+                    campaign_id TEXT, channel TEXT,
+                    revenue REAL NOT NULL, spend REAL NOT NULL, first_purchases REAL NOT NULL,
+                    PRIMARY KEY (campaign_id, channel)
+                );
+                CREATE TABLE IF NOT EXISTS channel_totals (
+                    channel TEXT PRIMARY KEY,
+                    revenue REAL NOT NULL, spend REAL NOT NULL, first_purchases REAL NOT NULL
+                );
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _get_meta(self, conn, key, default):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    @property
+    def watermark(self):
+        """Number of source rows already folded into the store."""
+        with self._connect() as conn:
+            return self._get_meta(conn, 'watermark', 0)
+
+    def reset(self):
+        with self._connect() as conn:
+            conn.executescript("""
+                DELETE FROM meta; DELETE FROM daily_kpis; DELETE FROM campaign_totals; DELETE FROM channel_totals;
+            """)
+
+    def ingest(self, new_rows):
+        """
+        Folds rows appended since the last refresh into the aggregates and the
+        top-k heaps, and advances the watermark, all in one transaction.
+        """
+        if new_rows.empty:
+            return 0
+        df = new_rows.reset_index(drop=True)
+        day_column = _day_column(df)
+        df['day'] = pd.to_datetime(df[day_column]).dt.strftime('%Y-%m-%d') if day_column else 'all'
+        df['campaign_id'] = df['campaign_id'].astype(str)
+        df['channel'] = df['channel'].astype(str)
+        sums = {'revenue': ('revenue_usd', 'sum'), 'spend': ('spend_usd', 'sum'),
+                'first_purchases': ('first_purchase', 'sum')}
+
+        # SQLite cannot bind NumPy integers, so sum in floats
+        df[['revenue_usd', 'spend_usd', 'first_purchase']] = df[['revenue_usd', 'spend_usd', 'first_purchase']].astype(float)
+
+        daily = df.groupby(['campaign_id', 'channel', 'day'], as_index=False).agg(**sums)
+        campaigns = df.groupby(['campaign_id', 'channel'], as_index=False).agg(**sums)
+        channels = df.groupby('channel', as_index=False).agg(**sums)
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            watermark = self._get_meta(conn, 'watermark', 0)
+            conn.executemany("""
+                INSERT INTO daily_kpis VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (campaign_id, channel, day) DO UPDATE SET
+                    revenue = revenue + excluded.revenue, spend = spend + excluded.spend,
+                    first_purchases = first_purchases + excluded.first_purchases
+            """, daily.itertuples(index=False, name=None))
+            conn.executemany("""
+                INSERT INTO campaign_totals VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (campaign_id, channel) DO UPDATE SET
+                    revenue = revenue + excluded.revenue, spend = spend + excluded.spend,
+                    first_purchases = first_purchases + excluded.first_purchases
+            """, campaigns.itertuples(index=False, name=None))
+            conn.executemany("""
+                INSERT INTO channel_totals VALUES (?, ?, ?, ?)
+                ON CONFLICT (channel) DO UPDATE SET
+                    revenue = revenue + excluded.revenue, spend = spend + excluded.spend,
+                    first_purchases = first_purchases + excluded.first_purchases
+            """, channels.itertuples(index=False, name=None))
+
+            self._update_roas_heap(conn, daily)
+            self._update_seo_heap(conn, df, watermark)
+            self._set_meta(conn, 'watermark', watermark + len(df))
+            conn.execute("COMMIT")
+        return len(df)
+
+    def _update_roas_heap(self, conn, daily):
+        # Heap entries: [roas, campaign_id, channel, day, revenue, spend]; smallest ROAS on top
+        heap = self._get_meta(conn, 'roas_heap', [])
+        touched = {}
+        for campaign_id, channel, day in daily[['campaign_id', 'channel', 'day']].itertuples(index=False, name=None):
+            revenue, spend = conn.execute(
+                "SELECT revenue, spend FROM daily_kpis WHERE campaign_id = ? AND channel = ? AND day = ?",
+                (campaign_id, channel, day),
+            ).fetchone()
+            touched[(campaign_id, channel, day)] = [_roas(revenue, spend), campaign_id, channel, day, revenue, spend]
+
+        # A key already in the heap whose ROAS dropped may now belong below some
+        # key we never kept; only then is a rescan of the daily table needed.
+        stale = [entry for entry in heap if tuple(entry[1:4]) in touched]
+        if len(heap) >= self.top_k and any(touched[tuple(e[1:4])][0] < e[0] for e in stale):
+            rows = conn.execute("""
+                SELECT campaign_id, channel, day, revenue, spend FROM daily_kpis
+                ORDER BY revenue / CASE WHEN spend = 0 THEN 1 ELSE spend END DESC LIMIT ?
+            """, (self.top_k,)).fetchall()
+            heap = [[_roas(revenue, spend), c, ch, d, revenue, spend] for c, ch, d, revenue, spend in rows]
+            heapq.heapify(heap)
+        else:
+            heap = [entry for entry in heap if tuple(entry[1:4]) not in touched]
+            heapq.heapify(heap)
+            for entry in touched.values():
+                if len(heap) < self.top_k:
+                    heapq.heappush(heap, entry)
+                elif entry[0] > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+        self._set_meta(conn, 'roas_heap', heap)
+
+    def _update_seo_heap(self, conn, df, watermark):
+        # Heap entries: [search_volume, -row_number, category, avg_position]; on equal
+        # volume the later row is evicted first, so the earliest row wins ties.
+        heap = self._get_meta(conn, 'seo_heap', [])
+        candidates = df[df['avg_position'] > 3]
+        for row_number, volume, category, position in zip(
+            watermark + candidates.index, candidates['monthly_search_volume'],
+            candidates['seo_category'], candidates['avg_position'],
+        ):
+            entry = [int(volume), -int(row_number), str(category), float(position)]
+            if len(heap) < self.top_k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        self._set_meta(conn, 'seo_heap', heap)
+
+    def top_roas(self):
+        """Top-k (campaign, channel, day) keys by ROAS, best first."""
+        with self._connect() as conn:
+            heap = self._get_meta(conn, 'roas_heap', [])
+        return [
+            {"id": c, "channel": ch, "day": d, "roas": roas, "revenue": revenue, "spend": spend}
+            for roas, c, ch, d, revenue, spend in sorted(heap, key=lambda e: e[0], reverse=True)
+        ]
+
+    def top_seo_opportunities(self):
+        """Top-k SEO rows (position worse than 3) by monthly search volume, biggest first."""
+        with self._connect() as conn:
+            heap = self._get_meta(conn, 'seo_heap', [])
+        return [
+            {"category": category, "search_volume": volume, "avg_position": position}
+            for volume, _, category, position in sorted(heap, reverse=True)
+        ]
+
+    def channel_summary(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT channel, revenue, spend, first_purchases FROM channel_totals ORDER BY channel").fetchall()
+        return {
+            channel: {"revenue": revenue, "spend": spend, "first_purchases": int(first_purchases),
+                      "roas": _roas(revenue, spend), "cac": _cac(spend, first_purchases)}
+            for channel, revenue, spend, first_purchases in rows
+        }
+
+    def campaign_cac(self):
+        """CAC per (campaign, channel) over all days, cheapest acquisition first."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT campaign_id, channel, spend, first_purchases FROM campaign_totals").fetchall()
+        campaigns = [
+            {"id": campaign_id, "channel": channel, "spend": spend, "first_purchases": int(first_purchases),
+             "cac": _cac(spend, first_purchases)}
+            for campaign_id, channel, spend, first_purchases in rows
+        ]
+        return sorted(campaigns, key=lambda c: (c['cac'], c['id'], c['channel']))
+
+
+def read_new_rows(data_path, watermark):
+    """
+    Reads only the rows appended after the first `watermark` data rows.
+    The header row is kept so columns are still named.
+    """
+    skip = range(1, watermark + 1)
+    if data_path.endswith('.csv'):
+        return pd.read_csv(data_path, skiprows=skip)
+    return pd.read_excel(data_path, skiprows=skip)
@@ -1,6 +1,12 @@
 import pandas as pd
 import numpy as np
 import os
+import glob
+import time
+import argparse
+from snapshot_store import write_snapshot
+from publish import write_csv_atomic
+from batch_cleaning import clean_shards, concat_csv_files, SHARDS_DIR
 
 print("--- Python script '01_data_cleaning.py' is starting ---")
 
@@ -63,14 +69,50 @@ def clean_google_play_data():
     os.makedirs(os.path.dirname(processed_data_path), exist_ok=True)
     
     # Save the cleaned dataframe
-    df.to_csv(processed_data_path, index=False)
+    write_csv_atomic(df, processed_data_path, index=False)
     print("--- Cleaning complete ---")
     print(f"Cleaned data saved to: {processed_data_path}")
     print(f"Original shape was approx (10841, 13). Cleaned shape is now: {df.shape}")
 
+    # Keep a dated copy so later stages can work on just the apps that changed
+    write_snapshot('google_play', df)
+
+def clean_google_play_batch(pattern, max_workers=None):
+    """
+    Cleans every Play Store export matching the glob pattern across all cores.
+    Writes one partition per input to data/processed/google_play_shards/ and
+    the combined, globally deduplicated google_play_cleaned.csv.
+    """
+    processed_data_path = os.path.join('data', 'processed', 'google_play_cleaned.csv')
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        print(f"Error: No files match '{pattern}'")
+        return
+
+    print(f"--- Cleaning {len(paths)} Play Store exports across {max_workers or os.cpu_count()} processes ---")
+    start = time.perf_counter()
+    partition_paths, frames = clean_shards(paths, max_workers=max_workers)
+
+    # Partitions share one header, so the combined file is a byte-level concatenation
+    concat_csv_files(partition_paths, processed_data_path)
+    df = pd.concat(frames, ignore_index=True)
+    print(f"--- Cleaning complete in {time.perf_counter() - start:.1f}s ---")
+    print(f"Partitions saved to: {SHARDS_DIR}/")
+    print(f"Cleaned data saved to: {processed_data_path}. Cleaned shape is now: {df.shape}")
+
+    write_snapshot('google_play', df)
+
 # This is the entry point of the script. It tells Python to run our function.
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Clean the Google Play Store data.")
+    parser.add_argument('--inputs', help="Glob of Play Store exports to clean in parallel, e.g. 'data/raw/exports/*.csv'.")
+    parser.add_argument('--workers', type=int, default=None, help="Processes for --inputs (default: all cores).")
+    args = parser.parse_args()
+
     print("--- Inside the '__main__' block, preparing to run the function ---")
-    clean_google_play_data()
+    if args.inputs:
+        clean_google_play_batch(args.inputs, args.workers)
+    else:
+        clean_google_play_data()
 
 print("--- Python script '01_data_cleaning.py' has finished ---")
\ No newline at end of file
@@ -2,7 +2,13 @@ import pandas as pd
 import requests
 import os
 import time 
+import argparse
+from datetime import datetime
 from dotenv import load_dotenv
+from work_queue import WorkQueue, default_worker_id
+from publish import write_csv_atomic
+from snapshot_store import (write_snapshot, list_snapshots, load_snapshot, changes_since, changed_apps,
+                            get_checkpoint, set_checkpoint, SNAPSHOT_FORMAT)
 
 # --- CONFIGURATION ---
 load_dotenv()
@@ -11,83 +17,152 @@ if not RAPIDAPI_KEY:
     raise ValueError("RAPIDAPI_KEY not found in .env file. Please add it.")
 
 API_URL = "https://appstore-scrapper-api.p.rapidapi.com/v1/app-store-api/search"
+API_HOST = "appstore-scrapper-api.p.rapidapi.com"
 
-# --- MAIN FUNCTION ---
-def fetch_and_combine_data():
-    """
-    Loads cleaned Google Play data, fetches corresponding Apple App Store data via API,
-    and combines them into a single dataset.
-    """
-    print("--- Starting Phase 2: API Integration & Data Unification ---")
+# Shared work queue for the multi-process sweep (see run_worker)
+QUEUE_PATH = os.path.join('data', 'queue', 'api_sweep.sqlite')
+RATE_LIMIT_BACKOFF_SECONDS = 5  # wait after a 429 before the same app is tried again
+# With --changed-only, iOS rows older than this are fetched again even if the Google Play row is unchanged
+IOS_MAX_AGE_SECONDS = 24 * 3600
+# Columns kept in the iOS snapshot only, not in the CSV outputs
+SNAPSHOT_ONLY_COLUMNS = ['Query', 'Fetched_At']
+
+# --- HELPERS ---
+def _api_headers():
+    # Headers - EXACTLY like the working test
+    return {
+        "x-rapidapi-key": RAPIDAPI_KEY,
+        "x-rapidapi-host": API_HOST
+    }
 
+def _load_top_google_apps(n=100):
     google_data_path = os.path.join('data', 'processed', 'google_play_cleaned.csv')
     try:
         google_df = pd.read_csv(google_data_path)
     except FileNotFoundError:
         print(f"Error: Cleaned data file not found at {google_data_path}")
         print("Please run '01_data_cleaning.py' first.")
-        return
+        return None
+    return google_df.sort_values(by='Installs', ascending=False).head(n)
+
+def query_app_store(app_name, headers):
+    """
+    Searches the App Store API for one app name.
+    Returns a (status, record) tuple where status is 'success', 'no_results',
+    'rate_limited' or 'error', and record is the iOS row on success.
+    """
+    # EXACT parameters that work (from successful test)
+    params = {
+        "num": "10",
+        "lang": "en",
+        "query": app_name,
+        "country": "us"
+    }
+
+    # EXACT request format from working test
+    response = requests.get(API_URL, headers=headers, params=params, timeout=30)
+    print(f"  -> Status: {response.status_code}")
+
+    if response.status_code == 200:
+        data = response.json()
+        print(f"  -> Found {len(data)} results")
+
+        if not data:  # data is a list directly
+            print(f"  -> No results for {app_name}")
+            return 'no_results', None
+
+        ios_app = data[0]  # Take first result
+        print(f"  -> SUCCESS! Found '{ios_app.get('title')}'")
+        return 'success', {
+            'App': ios_app.get('title'),
+            'Category': ios_app.get('primaryGenreName', 'Unknown'),
+            'Rating': ios_app.get('averageUserRating', 0),
+            'Reviews': ios_app.get('userRatingCount', 0),
+            'Price': ios_app.get('price', 0.0),
+            'App_ID': ios_app.get('id'),
+            'URL': ios_app.get('url'),
+            'Installs': None,
+            'Platform': 'iOS',
+            'Query': app_name,  # kept in the iOS snapshot to match rows back to Google Play apps
+            'Fetched_At': time.time()  # lets --changed-only refresh rows that are too old
+        }
+
+    if response.status_code == 429:
+        return 'rate_limited', None
+
+    print(f"  -> ERROR {response.status_code}: {response.text[:100]}")
+    return 'error', None
+
+# --- MAIN FUNCTION ---
+def _reusable_ios_rows(top_google_apps):
+    """
+    Splits the top apps into those that need a fetch (Google Play data changed
+    since the last fetch, or the iOS row is older than IOS_MAX_AGE_SECONDS)
+    and those whose iOS rows can be reused from the latest iOS snapshot.
+    Returns (apps_to_fetch, reused_rows).
+    """
+    checkpoint = get_checkpoint('api_integration')
+    _, diff = changes_since('google_play', checkpoint.get('google_play'))
+    ios_snapshots = list_snapshots('ios')
+    if diff is None or not ios_snapshots:
+        return top_google_apps, []
+    previous_ios = load_snapshot('ios', ios_snapshots[-1])
+    if 'Query' not in previous_ios.columns:
+        return top_google_apps, []
+
+    if 'Fetched_At' not in previous_ios.columns:
+        # Snapshots from before rows carried a fetch time: date them by the snapshot itself
+        previous_ios['Fetched_At'] = datetime.strptime(ios_snapshots[-1], SNAPSHOT_FORMAT).timestamp()
+    too_old = previous_ios['Fetched_At'] < time.time() - IOS_MAX_AGE_SECONDS
+    expired = set(previous_ios.loc[too_old, 'Query']) & set(top_google_apps['App'])
+
+    stale = changed_apps(diff) | expired | (set(top_google_apps['App']) - set(previous_ios['Query']))
+    apps_to_fetch = top_google_apps[top_google_apps['App'].isin(stale)]
+    reused = previous_ios[previous_ios['Query'].isin(set(top_google_apps['App']) - stale)]
+    reused = reused.astype(object).where(reused.notna(), None)
+    print(f"{len(diff['new'])} new, {len(diff['removed'])} removed and {len(diff['changed'])} changed Google Play apps "
+          f"since the last fetch; {len(expired)} iOS rows expired; reusing {len(reused)} iOS rows.")
+    return apps_to_fetch, reused.to_dict('records')
+
+def fetch_and_combine_data(changed_only=False):
+    """
+    Loads cleaned Google Play data, fetches corresponding Apple App Store data via API,
+    and combines them into a single dataset. With changed_only, only apps that are
+    new or changed since the last fetch are queried; the rest come from the iOS snapshot.
+    """
+    print("--- Starting Phase 2: API Integration & Data Unification ---")
 
-    top_100_google_apps = google_df.sort_values(by='Installs', ascending=False).head(100)
+    top_100_google_apps = _load_top_google_apps(100)
+    if top_100_google_apps is None:
+        return
     print(f"Selected {len(top_100_google_apps)} top Google Play apps to fetch from App Store.")
 
-    # Headers - EXACTLY like the working test
-    headers = {
-        "x-rapidapi-key": RAPIDAPI_KEY,
-        "x-rapidapi-host": "appstore-scrapper-api.p.rapidapi.com"
-    }
+    apps_to_fetch, app_store_data = top_100_google_apps, []
+    if changed_only:
+        apps_to_fetch, app_store_data = _reusable_ios_rows(top_100_google_apps)
+        print(f"Fetching {len(apps_to_fetch)} new or changed apps from the App Store.")
+
+    headers = _api_headers()
 
-    app_store_data = []
     successful_requests = 0
     failed_requests = 0
 
-    for index, row in top_100_google_apps.iterrows():
+    for index, row in apps_to_fetch.iterrows():
         app_name = row['App']
         print(f"Querying API for: {app_name}...")
         
-        # EXACT parameters that work (from successful test)
-        params = {
-            "num": "10",
-            "lang": "en", 
-            "query": app_name,
-            "country": "us"
-        }
-
         try:
-            # EXACT request format from working test
-            response = requests.get(API_URL, headers=headers, params=params, timeout=30)
-            print(f"  -> Status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                print(f"  -> Found {len(data)} results")
-                
-                if data:  # data is a list directly
-                    ios_app = data[0]  # Take first result
-                    app_store_data.append({
-                        'App': ios_app.get('title'),
-                        'Category': ios_app.get('primaryGenreName', 'Unknown'),
-                        'Rating': ios_app.get('averageUserRating', 0),
-                        'Reviews': ios_app.get('userRatingCount', 0),
-                        'Price': ios_app.get('price', 0.0),
-                        'App_ID': ios_app.get('id'),
-                        'URL': ios_app.get('url'),
-                        'Installs': None,
-                        'Platform': 'iOS'
-                    })
-                    print(f"  -> SUCCESS! Found '{ios_app.get('title')}'")
-                    successful_requests += 1
-                else:
-                    print(f"  -> No results for {app_name}")
-                    failed_requests += 1
-                    
-            elif response.status_code == 429:
-                print(f"  -> Rate limited. Waiting 5 seconds...")
-                time.sleep(5)
-                continue  # Retry this request
-                
+            status, record = query_app_store(app_name, headers)
+            # Retry the same app until the API stops rate limiting us
+            while status == 'rate_limited':
+                print(f"  -> Rate limited. Waiting {RATE_LIMIT_BACKOFF_SECONDS} seconds and retrying...")
+                time.sleep(RATE_LIMIT_BACKOFF_SECONDS)
+                status, record = query_app_store(app_name, headers)
+
+            if status == 'success':
+                app_store_data.append(record)
+                successful_requests += 1
             else:
-                print(f"  -> ERROR {response.status_code}: {response.text[:100]}")
                 failed_requests += 1
 
         except Exception as e:
@@ -104,18 +179,26 @@ def fetch_and_combine_data():
     print(f"\n=== FINAL RESULTS ===")
     print(f"Successful requests: {successful_requests}")
     print(f"Failed requests: {failed_requests}")
-    print(f"Success rate: {successful_requests/(successful_requests+failed_requests)*100:.1f}%")
+    print(f"Success rate: {successful_requests/max(successful_requests+failed_requests, 1)*100:.1f}%")
+
+    save_combined_data(top_100_google_apps, app_store_data)
 
+
+def save_combined_data(top_google_apps, app_store_data):
+    """
+    Builds the iOS and combined datasets from the fetched App Store rows and saves them.
+    """
     if not app_store_data:
         print("Could not fetch any data from the App Store API.")
         return
 
-    # Create iOS DataFrame
-    ios_df = pd.DataFrame(app_store_data)
+    # Create iOS DataFrame; the query column only goes into the snapshot
+    ios_snapshot_df = pd.DataFrame(app_store_data)
+    ios_df = ios_snapshot_df.drop(columns=SNAPSHOT_ONLY_COLUMNS, errors='ignore')
     print(f"\nSuccessfully fetched data for {len(ios_df)} iOS apps")
 
     # Create combined dataset
-    google_subset_df = top_100_google_apps[['App', 'Category', 'Rating', 'Reviews', 'Price', 'Installs']].copy()
+    google_subset_df = top_google_apps[['App', 'Category', 'Rating', 'Reviews', 'Price', 'Installs']].copy()
     google_subset_df['Platform'] = 'Android'
     
     # Add missing columns to match iOS data
@@ -126,23 +209,106 @@ def fetch_and_combine_data():
 
     # Save both datasets
     ios_output_path = os.path.join('data', 'processed', 'ios_apps_data.csv')
-    ios_df.to_csv(ios_output_path, index=False)
+    write_csv_atomic(ios_df, ios_output_path, index=False)
     
     combined_output_path = os.path.join('data', 'processed', 'combined_market_data.csv')
-    combined_df.to_csv(combined_output_path, index=False)
+    write_csv_atomic(combined_df, combined_output_path, index=False)
     
     print("\n--- Phase 2 Complete ---")
     print(f"iOS data saved to: {ios_output_path}")
     print(f"Combined dataset saved to: {combined_output_path}")
     print(f"Final dataset contains {len(combined_df)} entries ({len(google_subset_df)} Android + {len(ios_df)} iOS)")
+
+    # Record which Google Play snapshot this iOS data was fetched against
+    write_snapshot('ios', ios_snapshot_df)
+    google_snapshots = list_snapshots('google_play')
+    if google_snapshots:
+        set_checkpoint('api_integration', {'google_play': google_snapshots[-1]})
     
     # Show sample results
     print("\nSample of fetched iOS apps:")
     print(ios_df[['App', 'Category', 'Rating', 'Reviews', 'Price']].head())
 
 
-if __name__ == '__main__':
-    fetch_and_combine_data()
+# --- MULTI-PROCESS SWEEP ---
+def enqueue_top_apps(n=100, queue_path=QUEUE_PATH):
+    """
+    Puts the top N Google Play apps on the shared work queue. While a sweep
+    is in progress, re-running is safe: apps that are already queued are
+    skipped. Once the previous sweep is drained, its items are cleared and a
+    new sweep starts.
+    """
+    top_google_apps = _load_top_google_apps(n)
+    if top_google_apps is None:
+        return
+    queue = WorkQueue(queue_path)
+    if queue.stats() and queue.is_drained():
+        print(f"Previous sweep finished ({queue.stats()}); starting a new one.")
+        queue.clear()
+    added = queue.enqueue([{'app': app_name} for app_name in top_google_apps['App']], key_field='app')
+    print(f"Queued {added} new apps ({len(top_google_apps)} requested) in '{queue_path}'.")
+
+
+def run_worker(queue_path=QUEUE_PATH, worker_id=None, batch_size=5, idle_wait=10):
+    """
+    Leases apps from the shared work queue, queries the App Store API and
+    reports the rows back, until the queue is drained. Start as many workers
+    as you like, on this machine or on others sharing the queue file; items
+    held by a worker that crashes become visible again after the lease expires.
+    """
+    worker_id = worker_id or default_worker_id()
+    queue = WorkQueue(queue_path)
+    headers = _api_headers()
+    print(f"--- Worker '{worker_id}' started on '{queue_path}' ---")
+
+    processed = 0
+    while True:
+        items = queue.lease(worker_id, batch_size=batch_size)
+        if not items:
+            if queue.is_drained():
+                break
+            # Other workers still hold leases; wait in case one of them expires
+            time.sleep(idle_wait)
+            continue
+
+        for item_id, payload in items:
+            app_name = payload['app']
+            print(f"Querying API for: {app_name}...")
+            try:
+                status, record = query_app_store(app_name, headers)
+                if status == 'rate_limited':
+                    # Rate limits are expected with many workers on one key: they do not use up attempts
+                    print(f"  -> Rate limited. Releasing the item and waiting {RATE_LIMIT_BACKOFF_SECONDS} seconds...")
+                    queue.release(item_id, worker_id, delay=RATE_LIMIT_BACKOFF_SECONDS, reason='rate limited')
+                    time.sleep(RATE_LIMIT_BACKOFF_SECONDS)
+                elif status == 'error':
+                    queue.fail(item_id, worker_id, 'API error', retry=True)
+                else:
+                    # 'no_results' finishes the item too, just without a row
+                    queue.complete(item_id, worker_id, record)
+            except Exception as e:
+                print(f"  -> Exception: {e}")
+                queue.fail(item_id, worker_id, e, retry=True)
+            processed += 1
+
+            # Small delay to be nice to the API
+            time.sleep(1)
+
+    print(f"--- Worker '{worker_id}' finished after {processed} items. Queue status: {queue.stats()} ---")
+
+
+def combine_queue_results(n=100, queue_path=QUEUE_PATH):
+    """
+    Builds the combined dataset from the rows the workers reported.
+    """
+    top_google_apps = _load_top_google_apps(n)
+    if top_google_apps is None:
+        return
+    queue = WorkQueue(queue_path)
+    print(f"Queue status: {queue.stats()}")
+    app_store_data = [record for _, record in queue.results() if record]
+    save_combined_data(top_google_apps, app_store_data)
+
 
 
 def test_single_request():
@@ -256,5 +422,24 @@ def test_api_subscription():
 
 
 if __name__ == '__main__':
-    # The API is working! Run the full data fetch
-    fetch_and_combine_data()
+    parser = argparse.ArgumentParser(description="Fetch App Store data for the top Google Play apps.")
+    parser.add_argument('--queue', choices=['enqueue', 'work', 'combine', 'reset'],
+                        help="Run one step of the multi-process sweep instead of the single-process fetch.")
+    parser.add_argument('--top', type=int, default=100, help="Number of top Google Play apps to sweep.")
+    parser.add_argument('--queue-path', default=QUEUE_PATH, help="Path of the shared SQLite work queue.")
+    parser.add_argument('--worker-id', default=None, help="Worker id (defaults to hostname-pid).")
+    parser.add_argument('--changed-only', action='store_true',
+                        help="Only query apps that are new or changed since the last fetch.")
+    args = parser.parse_args()
+
+    if args.queue == 'enqueue':
+        enqueue_top_apps(args.top, args.queue_path)
+    elif args.queue == 'work':
+        run_worker(args.queue_path, args.worker_id)
+    elif args.queue == 'combine':
+        combine_queue_results(args.top, args.queue_path)
+    elif args.queue == 'reset':
+        print(f"Removed {WorkQueue(args.queue_path).clear()} items from '{args.queue_path}'.")
+    else:
+        # The API is working! Run the full data fetch
+        fetch_and_combine_data(changed_only=args.changed_only)
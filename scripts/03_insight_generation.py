@@ -1,91 +1,64 @@
 import pandas as pd
 import os
+import sys
 import json
-from openai import OpenAI
 from dotenv import load_dotenv
+from insight_rules import generate_local_insights
+from llm_router import get_router
+from publish import write_json_atomic
+from snapshot_store import changes_since, changed_apps, get_checkpoint, set_checkpoint
 
 # --- CONFIGURATION ---
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-if not GROQ_API_KEY:
-    raise ValueError("GROQ_API_KEY not found in .env file. Please add it.")
 
-client = OpenAI(
-    api_key=GROQ_API_KEY,
-    base_url="https://api.groq.com/openai/v1",
-)
+# How many locally computed candidates the LLM gets to phrase and rank
+MAX_LLM_CANDIDATES = 10
+# How many insights to keep when running without the LLM
+MAX_LOCAL_INSIGHTS = 5
+# The only fields the LLM may rewrite; everything else comes from the local candidates
+LLM_TEXT_FIELDS = ("title", "summary", "recommendation")
 
 # --- MAIN FUNCTION ---
-def generate_insights():
+def _phrase_with_llm(candidates):
     """
-    Loads the combined dataset, prepares summaries, sends them to the Groq LLM
-    with a clear JSON schema example, and saves the insights.
+    Sends the short list of locally computed candidates to the Groq LLM, which
+    only ranks and rewrites them. Returns None if there is no API key or the
+    call, the JSON or its validation fails.
     """
-    print("--- Starting Phase 3: AI-Powered Insight Generation (with JSON Schema) ---")
+    if not GROQ_API_KEY:
+        print("GROQ_API_KEY not found in .env file; skipping the LLM.")
+        return None
 
-    # 1. Load the combined dataset
-    combined_data_path = os.path.join('data', 'processed', 'combined_market_data.csv')
-    try:
-        df = pd.read_csv(combined_data_path)
-    except FileNotFoundError:
-        print(f"Error: Combined data file not found at {combined_data_path}")
-        return
-
-    # 2. Prepare the data for the LLM
-    app_counts = df['App'].value_counts()
-    apps_on_both_platforms = app_counts[app_counts == 2].index.tolist()
-    df_filtered = df[df['App'].isin(apps_on_both_platforms)]
-    df_filtered = df_filtered[df_filtered['Reviews'] > 0]
-
-    if df_filtered.empty:
-        print("Could not find enough comparable data after filtering. Exiting.")
-        return
-
-    data_summary = df_filtered.to_json(orient='records')
-    print(f"Prepared a summary of {len(df_filtered)} data points for the LLM.")
-
-    # 3. Define the prompt WITH a clear JSON schema example
-    # This is the key improvement!
-    json_schema_example = """
-    [
-      {
-        "insight_id": "CP-001",
-        "insight_type": "Cross-Platform Comparison",
-        "title": "Example Title: App Performance on Android vs. iOS",
-        "summary": "A detailed explanation of the finding, referencing data.",
-        "supporting_data": { "app": "Example App", "android_rating": 4.5, "ios_rating": 4.7 },
-        "recommendation": "An actionable business suggestion based on the insight.",
-        "confidence_score": 0.9
-      }
-    ]
-    """
+    candidates_json = json.dumps(candidates, indent=2)
+    print(f"Prepared {len(candidates)} candidate insights for the LLM.")
 
     user_prompt = f"""
-    You are an expert market analyst for the mobile app industry. Analyze the provided JSON data about mobile apps.
-    Your task is to generate 3-5 key market intelligence insights from the data.
+    You are an expert market analyst for the mobile app industry. Below are candidate market insights
+    that were computed statistically from cross-platform app data.
+    Your task is to pick the 3-5 most strategically important candidates and rewrite their
+    "title", "summary" and "recommendation" fields in clear, executive-ready language.
 
-    You MUST respond with ONLY a single, valid JSON array that follows the exact schema and structure shown in the example below.
-    Do not include any introductory text, markdown formatting, or any other content outside of the JSON array.
+    Keep "insight_id", "insight_type", "supporting_data" and "confidence_score" exactly as given,
+    and order the array from most to least important.
 
-    JSON Schema Example:
-    {json_schema_example}
+    You MUST respond with ONLY a single, valid JSON array that follows the exact schema of the candidates.
+    Do not include any introductory text, markdown formatting, or any other content outside of the JSON array.
 
-    Now, analyze the following data and provide your response:
-    {data_summary}
+    Candidate insights:
+    {candidates_json}
     """
 
-    # 4. Call the Groq LLM API
-    print("Sending data to the Groq LLM for analysis...")
+    print("Sending candidate insights to the Groq LLM for ranking and phrasing...")
+    insights_json_string = ""
     try:
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[{"role": "user", "content": user_prompt}],
+        insights_json_string = get_router().complete(
+            "insight_phrasing",
+            [{"role": "user", "content": user_prompt}],
             temperature=0.5, # Lower temp for better schema adherence
             max_tokens=4096,
         )
-        
-        insights_json_string = response.choices[0].message.content
-        insights = json.loads(insights_json_string)
+        return _merge_llm_phrasing(candidates, json.loads(insights_json_string))
 
     except json.JSONDecodeError as e:
         print(f"\n--- ERROR: Failed to decode JSON from the LLM response. ---")
@@ -93,19 +66,106 @@ def generate_insights():
         print("\n--- Raw LLM Response: ---")
         print(insights_json_string)
         print("-----------------------")
-        return
+        return None
     except Exception as e:
         print(f"An error occurred while calling the LLM API: {e}")
+        return None
+
+
+def _merge_llm_phrasing(candidates, response):
+    """
+    Joins the LLM's ranked response back to the candidates by insight_id.
+    Only the text fields are taken from the LLM; ids, types, supporting data
+    and confidence scores always come from the local candidates. Entries with
+    unknown ids or missing text are dropped. Returns None if nothing valid is left.
+    """
+    if not isinstance(response, list):
+        print("The LLM response is not a JSON array.")
+        return None
+
+    by_id = {candidate['insight_id']: candidate for candidate in candidates}
+    insights, seen = [], set()
+    for item in response:
+        if not isinstance(item, dict) or item.get('insight_id') not in by_id or item['insight_id'] in seen:
+            continue
+        if not all(isinstance(item.get(field), str) and item[field].strip() for field in LLM_TEXT_FIELDS):
+            continue
+        seen.add(item['insight_id'])
+        insight = dict(by_id[item['insight_id']])
+        insight.update({field: item[field].strip() for field in LLM_TEXT_FIELDS})
+        insights.append(insight)
+
+    if not insights:
+        print("The LLM response did not match any candidate insight.")
+        return None
+    return insights
+
+
+def _changes_since_last_run():
+    """
+    Returns (latest snapshot ids, number of new/removed/changed apps) across
+    the Google Play and iOS histories since insights were last generated.
+    """
+    checkpoint = get_checkpoint('insight_generation')
+    latest, changes = {}, 0
+    for source in ('google_play', 'ios'):
+        snapshot_id, diff = changes_since(source, checkpoint.get(source))
+        if diff is None:
+            return None, None
+        latest[source] = snapshot_id
+        changes += len(changed_apps(diff)) + len(diff['removed'])
+    return latest, changes
+
+def generate_insights(use_llm=True, changed_only=False):
+    """
+    Loads the combined dataset, computes candidate insights locally with the
+    rule engine in insight_rules.py, lets the Groq LLM rank and phrase a short
+    list of them (unless use_llm is False), and saves the insights.
+    With changed_only, nothing is regenerated if no app changed since the last run.
+    """
+    print("--- Starting Phase 3: AI-Powered Insight Generation (local rules + LLM phrasing) ---")
+
+    latest_snapshots, changes = _changes_since_last_run()
+    if changed_only and changes == 0 and os.path.exists('insights.json'):
+        print("No apps changed since the last run. Keeping the existing insights.json.")
+        return
+
+    # 1. Load the combined dataset
+    combined_data_path = os.path.join('data', 'processed', 'combined_market_data.csv')
+    try:
+        df = pd.read_csv(combined_data_path)
+    except FileNotFoundError:
+        print(f"Error: Combined data file not found at {combined_data_path}")
         return
 
-    # 5. Save the insights
+    # 2. Compute candidate insights locally from the data
+    candidates = generate_local_insights(df)
+    if not candidates:
+        print("Could not find enough comparable data after filtering. Exiting.")
+        return
+    print(f"Computed {len(candidates)} candidate insights locally.")
+
+    if use_llm:
+        shortlist = candidates[:MAX_LLM_CANDIDATES]
+        insights = _phrase_with_llm(shortlist)
+        if insights is None:
+            print("Falling back to the locally computed insights.")
+            insights = candidates[:MAX_LOCAL_INSIGHTS]
+    else:
+        insights = candidates[:MAX_LOCAL_INSIGHTS]
+
+    # 3. Save the insights
     output_path = 'insights.json'
-    with open(output_path, 'w') as f:
-        json.dump(insights, f, indent=4)
+    write_json_atomic(output_path, insights, indent=4)
     
     print("\n--- Phase 3 Complete ---")
     print(f"Successfully generated {len(insights)} insights.")
     print(f"Insights saved to: {output_path}")
 
+    if latest_snapshots:
+        set_checkpoint('insight_generation', latest_snapshots)
+
 if __name__ == '__main__':
-    generate_insights()
\ No newline at end of file
+    # Pass --local-only to skip the LLM and save the rule-engine insights directly,
+    # and --changed-only to skip the run when no app changed since the last one
+    generate_insights(use_llm='--local-only' not in sys.argv, changed_only='--changed-only' in sys.argv)
\ No newline at end of file
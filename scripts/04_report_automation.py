@@ -1,5 +1,8 @@
 import json
 import os
+import sys
+import pandas as pd
+from report_renderer import render_reports, market_stats, slugify, REPORTS_DIR
 
 def generate_markdown_report():
     """
@@ -18,28 +21,109 @@ def generate_markdown_report():
         print(f"Error: '{insights_path}' not found. Please run the Phase 3 script first.")
         return
 
-    # Start building the Markdown report string
-    report_content = "# AI-Powered Market Intelligence Report\n\n"
-    report_content += "This report details key insights generated from the analysis of top mobile applications.\n\n"
-    report_content += "---\n\n"
-
-    for insight in insights:
-        report_content += f"## {insight['title']}\n\n"
-        report_content += f"**Insight Type:** {insight['insight_type']}\n\n"
-        report_content += f"**Summary:** {insight['summary']}\n\n"
-        report_content += f"**Recommendation:** {insight['recommendation']}\n\n"
-        report_content += f"**Confidence:** {insight['confidence_score'] * 100:.0f}%\n\n"
-        report_content += "**Supporting Data:**\n"
-        report_content += "```json\n"
-        report_content += f"{json.dumps(insight['supporting_data'], indent=2)}\n"
-        report_content += "```\n\n"
-        report_content += "---\n\n"
-
-    # Save the report to a file
-    with open(report_path, 'w',encoding='utf-8') as f:
-        f.write(report_content)
-
-    print(f"✅ Success! Report generated and saved to '{report_path}'")
+    # Stream the precompiled template straight into the report file, unless its inputs are unchanged
+    rendered, _ = render_reports([('executive.md', report_path, {'insights': insights})])
+
+    if rendered:
+        print(f"✅ Success! Report generated and saved to '{report_path}'")
+    else:
+        print(f"✅ Insights unchanged; '{report_path}' is up to date")
+
+def _insight_platforms(insight):
+    supporting_data = insight.get('supporting_data', {})
+    if 'platform' in supporting_data:
+        return {supporting_data['platform']}
+    if 'android_rating' in supporting_data and 'ios_rating' in supporting_data:
+        return {'Android', 'iOS'}
+    return set()
+
+def _d2c_channel_insights(channel, d2c_insights):
+    # Present the channel's top ROAS keys in the same schema as app insights
+    insights = []
+    for i, campaign in enumerate(c for c in d2c_insights.get('top_roas_campaigns', []) if c['channel'] == channel):
+        insights.append({
+            "insight_id": f"D2C-{slugify(channel)}-{i + 1:03d}",
+            "insight_type": "Campaign ROAS",
+            "title": f"Campaign '{campaign['id']}' Returned a ROAS of {campaign['roas']}",
+            "summary": (f"On {campaign.get('day', 'record')}, '{campaign['id']}' generated ${campaign['revenue']:,.2f} "
+                        f"of revenue from ${campaign['spend']:,.2f} of spend on {channel}."),
+            "supporting_data": campaign,
+            "recommendation": f"Shift {channel} budget toward creatives and audiences similar to '{campaign['id']}'.",
+            "confidence_score": 1.0,
+        })
+    return insights
+
+def generate_segment_reports():
+    """
+    Renders Markdown and HTML reports per platform, per category and per D2C
+    channel. Only reports whose inputs changed since the last run are
+    re-rendered, in parallel across processes.
+    """
+    print("--- Starting Phase 4, Part 2: Generating Segment Reports ---")
+
+    insights = []
+    if os.path.exists('insights.json'):
+        with open('insights.json', 'r', encoding='utf-8') as f:
+            insights = json.load(f)
+
+    combined_data_path = os.path.join('data', 'processed', 'combined_market_data.csv')
+    combined_df = pd.read_csv(combined_data_path) if os.path.exists(combined_data_path) else None
+
+    d2c_insights_path = os.path.join('phase5_extension', 'd2c_insights.json')
+    d2c_insights = None
+    if os.path.exists(d2c_insights_path):
+        with open(d2c_insights_path, 'r') as f:
+            d2c_insights = json.load(f)
+
+    segments = []  # (segment type, name, description, stats, insights)
+    if combined_df is not None:
+        for platform, platform_df in combined_df.groupby('Platform'):
+            segments.append(('platform', platform, f"Market intelligence for {platform} apps.",
+                             market_stats(platform_df),
+                             [i for i in insights if platform in _insight_platforms(i)]))
+        # Per platform: the stores name categories differently ('BUSINESS' vs 'Business'),
+        # and the platform in the name keeps the report paths apart
+        for (platform, category), category_df in combined_df.groupby(['Platform', 'Category']):
+            segments.append(('category', f"{category} ({platform})",
+                             f"Market intelligence for the {category} category on {platform}.",
+                             market_stats(category_df),
+                             [i for i in insights if i.get('supporting_data', {}).get('category') == category
+                              and platform in _insight_platforms(i)]))
+
+    if d2c_insights:
+        channel_summary = d2c_insights.get('channel_summary') or {
+            d2c_insights['best_roas_campaign']['channel']: {}
+        }
+        for channel, summary in channel_summary.items():
+            stats = {
+                "Revenue": f"${summary['revenue']:,.2f}", "Spend": f"${summary['spend']:,.2f}",
+                "First purchases": f"{summary['first_purchases']:,}",
+                "ROAS": summary['roas'], "CAC": f"${summary['cac']:,.2f}",
+            } if summary else {}
+            segments.append(('d2c_channel', channel, f"D2C campaign performance on {channel}.",
+                             stats, _d2c_channel_insights(channel, d2c_insights)))
+
+    if not segments:
+        print("Error: No input data found. Please run the Phase 2, 3 and 5 scripts first.")
+        return
+
+    jobs = []
+    for segment_type, name, description, stats, segment_insights in segments:
+        context = {
+            'heading': f"{name} — Market Intelligence Report",
+            'description': description,
+            'stats': stats,
+            'insights': segment_insights,
+        }
+        for extension in ('md', 'html'):
+            output_path = os.path.join(REPORTS_DIR, segment_type, f"{slugify(name)}.{extension}")
+            jobs.append((f"segment.{extension}", output_path, context))
+
+    rendered, skipped = render_reports(jobs, prune_dir=REPORTS_DIR)
+    print(f"✅ Success! Rendered {rendered} reports, {skipped} unchanged, in '{REPORTS_DIR}/'")
 
 if __name__ == '__main__':
-    generate_markdown_report()
\ No newline at end of file
+    generate_markdown_report()
+    # --segments also renders the per-platform, per-category and per-channel reports
+    if '--segments' in sys.argv:
+        generate_segment_reports()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from publish import atomic_write, write_csv_atomic
+
+# Batch cleaning of many Play Store exports (regional / dated dumps) across a
+# process pool. The result matches cleaning the concatenation of all inputs, in
+# input order, with clean_google_play_data(), in two parallel phases:
+#
+#   map:    parse and convert each shard, dedup it locally and hand the parent
+#           only the small key columns (App, Category, Rating, validity)
+#   merge:  the parent dedups App globally (first shard wins) and merges the
+#           per-category rating sums of the surviving rows
+#   finish: each shard drops its global duplicates, imputes ratings from the
+#           merged category means and writes its own partition
+#
+# Between the phases, parsed shards wait as pickles in a scratch directory, so
+# only the key columns travel to the parent for the merge. The cleaned shards
+# do come back to the parent at the end of the finish phase, since the dated
+# snapshot (snapshot_store.write_snapshot) is written from the combined frame.
+SHARDS_DIR = os.path.join('data', 'processed', 'google_play_shards')
+KEY_COLUMNS = ['App', 'Category', 'Rating']
+
+
+def _parse_shard(path):
+    df = pd.read_csv(path)
+    # Known misaligned row in Play Store exports
+    df = df[df['Category'] != '1.9']
+    df = df.drop_duplicates(subset=['App'], keep='first')
+
+    df['Reviews'] = pd.to_numeric(df['Reviews'], errors='coerce')
+    df['Installs'] = pd.to_numeric(df['Installs'].astype(str).str.replace('[,+]', '', regex=True), errors='coerce')
+    df['Price'] = pd.to_numeric(df['Price'].astype(str).str.replace('$', '', regex=False), errors='coerce')
+    df['Price'] = df['Price'].fillna(0).astype(float)
+    df['Rating'] = pd.to_numeric(df['Rating'], errors='coerce')
+    df['Last Updated'] = pd.to_datetime(df['Last Updated'], errors='coerce')
+    # Rows with unparseable Reviews/Installs are dropped, but only after global dedup
+    df['_valid'] = df['Reviews'].notna() & df['Installs'].notna()
+    return df.reset_index(drop=True)
+
+
+def _map_shard(args):
+    path, work_path = args
+    df = _parse_shard(path)
+    df.to_pickle(work_path)
+    return list(df.columns.drop('_valid')), df[KEY_COLUMNS + ['_valid']]
+
+
+def merge_keys(key_frames):
+    """
+    Global dedup and rating statistics over the shards' key columns.
+    Returns (keep masks per shard, category mean ratings, fallback mean rating),
+    the same values clean_google_play_data() computes on the concatenated data.
+    """
+    keys = pd.concat(key_frames, ignore_index=True)
+    keep = ~keys['App'].duplicated(keep='first')
+    bounds = np.cumsum([0] + [len(frame) for frame in key_frames])
+    keep_masks = [keep.values[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    survivors = keys[keep & keys['_valid']]
+    by_category = survivors.groupby('Category', dropna=False)['Rating'].agg(['sum', 'count', 'size'])
+    rated = by_category[by_category['count'] > 0]
+    means = rated['sum'] / rated['count']
+
+    # The fallback is the mean after category imputation: every row of a rated
+    # category counts at its category mean. Rows without a category are never
+    # imputed and only count where they have a rating of their own.
+    no_category = rated.index.isna()
+    total = (means[~no_category] * rated.loc[~no_category, 'size']).sum() + rated.loc[no_category, 'sum'].sum()
+    rows = rated.loc[~no_category, 'size'].sum() + rated.loc[no_category, 'count'].sum()
+    fallback = total / rows if rows else np.nan
+    return keep_masks, means[~no_category].to_dict(), fallback
+
+
+def _finish_shard(args):
+    work_path, keep_mask, columns, category_means, fallback, output_path = args
+    df = pd.read_pickle(work_path)
+    df = df[keep_mask & df['_valid'].values].reindex(columns=columns)
+    df['Reviews'] = df['Reviews'].astype(int)
+    df['Installs'] = df['Installs'].astype(int)
+
+    df['Rating'] = df['Rating'].fillna(df['Category'].map(category_means)).fillna(fallback).round(2)
+    df = df.dropna(subset=['Last Updated', 'Category', 'Content Rating'])
+
+    write_csv_atomic(df, output_path, index=False)
+    return df
+
+
+def shard_output_name(path, common_dir):
+    """Partition file name that stays unique for same-named exports in different folders."""
+    relative = os.path.relpath(os.path.splitext(path)[0], common_dir)
+    return relative.replace(os.sep, '__') + '.csv'
+
+
+def concat_csv_files(paths, output_path):
+    """Joins CSV files with identical headers by copying bytes, without parsing them again."""
+    with atomic_write(output_path, 'wb') as out:
+        for i, path in enumerate(paths):
+            with open(path, 'rb') as f:
+                header = f.readline()
+                if i == 0:
+                    out.write(header)
+                shutil.copyfileobj(f, out, 1 << 20)
+
+
+def clean_shards(paths, output_dir=SHARDS_DIR, max_workers=None):
+    """
+    Cleans the input files across a process pool and writes one partition per
+    input to output_dir. Returns (partition paths, cleaned DataFrames), both
+    in input order; the frames are pickled back from the workers.
+    """
+    common_dir = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    output_paths = [os.path.join(output_dir, shard_output_name(os.path.abspath(path), common_dir)) for path in paths]
+    os.makedirs(output_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=output_dir, prefix='.work-') as work_dir, \
+            ProcessPoolExecutor(max_workers=max_workers) as executor:
+        work_paths = [os.path.join(work_dir, f'{i}.pkl') for i in range(len(paths))]
+        mapped = list(executor.map(_map_shard, zip(paths, work_paths)))
+
+        columns = list(dict.fromkeys(column for shard_columns, _ in mapped for column in shard_columns))
+        keep_masks, category_means, fallback = merge_keys([keys for _, keys in mapped])
+
+        frames = list(executor.map(_finish_shard, [
+            (work_path, keep_mask, columns, category_means, fallback, output_path)
+            for work_path, keep_mask, output_path in zip(work_paths, keep_masks, output_paths)
+        ]))
+    return output_paths, frames
@@ -0,0 +1,119 @@
+import os
+import time
+import json
+import msgpack
+import pandas as pd
+from publish import atomic_write, file_hash
+from report_renderer import market_stats
+
+# --- CONFIGURATION ---
+# One display-ready file for the dashboard: insight and creative text already
+# rendered to Markdown, summary stats already formatted, market data stored
+# column-wise. It is msgpack-encoded so the dashboard loads it in one read.
+BUNDLE_PATH = os.path.join('data', 'dashboard_bundle.msgpack')
+BUNDLE_SCHEMA_VERSION = 2  # bump whenever the bundle layout changes
+
+INSIGHTS_PATH = 'insights.json'
+COMBINED_DATA_PATH = os.path.join('data', 'processed', 'combined_market_data.csv')
+D2C_INSIGHTS_PATH = os.path.join('phase5_extension', 'd2c_insights.json')
+D2C_CREATIVE_PATH = os.path.join('phase5_extension', 'd2c_creative_outputs.json')
+SOURCE_PATHS = [INSIGHTS_PATH, COMBINED_DATA_PATH, D2C_INSIGHTS_PATH, D2C_CREATIVE_PATH]
+
+
+def source_hashes():
+    """
+    Content hash of each source file (None if missing), used to detect a stale
+    bundle. Hashes, not mtimes, so rewriting a source with the same bytes keeps it fresh.
+    """
+    return {path: file_hash(path) if os.path.exists(path) else None for path in SOURCE_PATHS}
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _render_insight(insight):
+    return {
+        "title": insight['title'],
+        "insight_type": insight['insight_type'],
+        "summary_md": f"**Summary:** {insight['summary']}",
+        "recommendation_md": f"**Recommendation:** {insight['recommendation']}",
+        "confidence": insight['confidence_score'],
+        "confidence_text": f"Confidence: {int(insight['confidence_score']*100)}%",
+        "supporting_data": insight['supporting_data'],
+    }
+
+
+def _render_d2c(d2c_insights, d2c_creative):
+    roas_insight = d2c_insights['best_roas_campaign']
+    seo_insight = d2c_insights['top_seo_opportunity']
+    return {
+        "best_campaign_md": (f"**Best Campaign:** '{roas_insight['id']}' on {roas_insight['channel']} "
+                             f"had a massive ROAS of **{roas_insight['roas']}**."),
+        "seo_opportunity_md": (f"**Top SEO Opportunity:** The category '{seo_insight['category']}' has high search "
+                               f"volume but a low ranking, making it a prime target for growth."),
+        "ad_headlines_md": d2c_creative['ad_headlines'].replace('\n', '\n\n'),
+        "seo_description_md": d2c_creative['seo_description'],
+    }
+
+
+def build_bundle():
+    """Builds the bundle from the pipeline outputs; sections whose inputs are missing are None."""
+    sources = source_hashes()
+    insights = _load_json(INSIGHTS_PATH)
+    d2c_insights = _load_json(D2C_INSIGHTS_PATH)
+    d2c_creative = _load_json(D2C_CREATIVE_PATH)
+
+    market, stats = None, None
+    if os.path.exists(COMBINED_DATA_PATH):
+        df = pd.read_csv(COMBINED_DATA_PATH)
+        market = {"columns": list(df.columns), "data": df.to_dict(orient='list')}
+        stats = {"All": market_stats(df)}
+        stats.update({platform: market_stats(platform_df) for platform, platform_df in df.groupby('Platform')})
+
+    return {
+        "schema_version": BUNDLE_SCHEMA_VERSION,
+        "generated_at": time.time(),
+        "sources": sources,
+        "insights": [_render_insight(insight) for insight in insights] if insights else None,
+        "market": market,
+        "market_stats": stats,
+        "d2c": _render_d2c(d2c_insights, d2c_creative) if d2c_insights and d2c_creative else None,
+    }
+
+
+def write_bundle(bundle, path=BUNDLE_PATH):
+    with atomic_write(path, 'wb') as f:
+        f.write(msgpack.packb(bundle, use_bin_type=True))
+
+
+def read_bundle(path=BUNDLE_PATH):
+    """
+    Loads the bundle in a single read. Returns None if it is missing,
+    unreadable, from another schema version or built from other source contents.
+    """
+    try:
+        with open(path, 'rb') as f:
+            bundle = msgpack.unpackb(f.read(), raw=False)
+    except (FileNotFoundError, ValueError, msgpack.UnpackException):
+        return None
+    if not isinstance(bundle, dict) or bundle.get('schema_version') != BUNDLE_SCHEMA_VERSION:
+        return None
+    if bundle.get('sources') != source_hashes():
+        return None
+    return bundle
+
+
+def market_dataframe(bundle):
+    market = bundle['market']
+    return pd.DataFrame(market['data'], columns=market['columns']) if market else None
+
+
+if __name__ == '__main__':
+    bundle = build_bundle()
+    write_bundle(bundle)
+    print(f"✅ Dashboard bundle (schema v{BUNDLE_SCHEMA_VERSION}, {os.path.getsize(BUNDLE_PATH):,} bytes) "
+          f"saved to '{BUNDLE_PATH}'")
@@ -0,0 +1,242 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+
+# --- CONFIGURATION ---
+# Minimum effect sizes before a finding is worth reporting
+MIN_RATING_DELTA = 0.2      # stars, for cross-platform and paid-vs-free gaps
+OUTLIER_Z = 2.0             # |z| within a (Platform, Category) group
+MIN_GROUP_SIZE = 5          # apps needed in a group before z-scores mean anything
+TOP_SHARE_FRACTION = 0.1    # "top 10% of apps" for review concentration
+MIN_TOP_SHARE = 0.5         # share of all reviews the top apps must hold to call it concentrated
+
+# Rating gap (stars) at which a cross-platform delta gets 50% confidence from
+# its size alone. Review counts in the 10^4-10^7 range make any z-test on two
+# averaged ratings saturate, so the effect size drives the score instead.
+HALF_CONFIDENCE_DELTA = 0.5
+
+
+def _normal_cdf(z):
+    """Logistic approximation of the standard normal CDF (vectorized, no scipy)."""
+    return 1.0 / (1.0 + np.exp(-1.702 * np.asarray(z, dtype=float)))
+
+
+def _confidence_from_z(z):
+    """Two-sided confidence that an effect is real, capped below certainty."""
+    return np.clip(2.0 * _normal_cdf(np.abs(z)) - 1.0, 0.0, 0.99)
+
+
+def _confidence_from_n(n):
+    """Confidence that grows with sample size, used where no z-score exists."""
+    return np.clip(1.0 - 1.0 / np.sqrt(np.maximum(np.asarray(n, dtype=float), 1.0)), 0.0, 0.99)
+
+
+def _confidence_from_effect(delta, half_confidence):
+    """Confidence that grows with the size of an effect and never saturates: 0.5 at `half_confidence`."""
+    delta = np.abs(np.asarray(delta, dtype=float))
+    return delta / (delta + half_confidence)
+
+
+def cross_platform_deltas(df, max_insights=5):
+    """
+    Rating deltas for every app that appears on both Android and iOS.
+    Confidence grows with the size of the gap, discounted when the platform
+    with fewer reviews has only a handful of them.
+    """
+    pairs = df[df['Reviews'] > 0].pivot_table(
+        index='App', columns='Platform', values=['Rating', 'Reviews'], aggfunc='first'
+    )
+    if ('Rating', 'Android') not in pairs.columns or ('Rating', 'iOS') not in pairs.columns:
+        return []
+    pairs = pairs.dropna(subset=[('Rating', 'Android'), ('Rating', 'iOS')])
+
+    android_rating = pairs[('Rating', 'Android')].astype(float)
+    ios_rating = pairs[('Rating', 'iOS')].astype(float)
+    android_reviews = pairs[('Reviews', 'Android')].astype(float)
+    ios_reviews = pairs[('Reviews', 'iOS')].astype(float)
+
+    delta = ios_rating - android_rating
+    confidence = (_confidence_from_effect(delta, HALF_CONFIDENCE_DELTA)
+                  * _confidence_from_n(np.minimum(android_reviews, ios_reviews)))
+    result = pd.DataFrame({
+        'android_rating': android_rating,
+        'ios_rating': ios_rating,
+        'android_reviews': android_reviews,
+        'ios_reviews': ios_reviews,
+        'delta': delta,
+        'confidence': confidence,
+    })
+    result = result[result['delta'].abs() >= MIN_RATING_DELTA]
+    result = result.reindex(result['delta'].abs().sort_values(ascending=False).index).head(max_insights)
+
+    insights = []
+    for app, row in result.iterrows():
+        better, worse = ('iOS', 'Android') if row['delta'] > 0 else ('Android', 'iOS')
+        insights.append({
+            "insight_type": "Cross-Platform Comparison",
+            "title": f"{app} Rates Higher on {better} than {worse}",
+            "summary": (f"{app} averages {row['ios_rating']:.2f} on iOS versus {row['android_rating']:.2f} "
+                        f"on Android, a gap of {abs(row['delta']):.2f} stars."),
+            "supporting_data": {
+                "app": app,
+                "android_rating": round(float(row['android_rating']), 2),
+                "ios_rating": round(float(row['ios_rating']), 2),
+                "android_reviews": int(row['android_reviews']),
+                "ios_reviews": int(row['ios_reviews']),
+                "rating_delta": round(float(row['delta']), 2),
+            },
+            "recommendation": f"Review {worse} user feedback for {app} and close the experience gap with {better}.",
+            "confidence_score": round(float(row['confidence']), 2),
+        })
+    return insights
+
+
+def category_outliers(df, max_insights=5):
+    """
+    Apps whose rating is a z-score outlier within their (Platform, Category) group.
+    Confidence combines the size of the deviation with the size of the group.
+    """
+    groups = df.groupby(['Platform', 'Category'])['Rating']
+    scored = df.assign(
+        group_mean=groups.transform('mean'),
+        group_std=groups.transform('std'),
+        group_size=groups.transform('count'),
+    )
+    scored = scored[(scored['group_size'] >= MIN_GROUP_SIZE) & (scored['group_std'] > 0)]
+    scored = scored.assign(z=(scored['Rating'] - scored['group_mean']) / scored['group_std'])
+    scored = scored[scored['z'].abs() >= OUTLIER_Z]
+    scored = scored.assign(
+        confidence=_confidence_from_z(scored['z']) * _confidence_from_n(scored['group_size'])
+    )
+    scored = scored.reindex(scored['z'].abs().sort_values(ascending=False).index).head(max_insights)
+
+    insights = []
+    for _, row in scored.iterrows():
+        direction = "above" if row['z'] > 0 else "below"
+        insights.append({
+            "insight_type": "Category Outlier",
+            "title": f"{row['App']} Is a Rating Outlier in {row['Category']} ({row['Platform']})",
+            "summary": (f"{row['App']} is rated {row['Rating']:.2f}, {abs(row['z']):.1f} standard deviations "
+                        f"{direction} the {row['Category']} average of {row['group_mean']:.2f} on {row['Platform']}."),
+            "supporting_data": {
+                "app": row['App'],
+                "platform": row['Platform'],
+                "category": row['Category'],
+                "rating": round(float(row['Rating']), 2),
+                "category_mean_rating": round(float(row['group_mean']), 2),
+                "z_score": round(float(row['z']), 2),
+                "category_size": int(row['group_size']),
+            },
+            "recommendation": (f"Study what sets {row['App']} apart in {row['Category']}."
+                               if row['z'] > 0 else
+                               f"Investigate the drivers behind {row['App']}'s low rating in {row['Category']}."),
+            "confidence_score": round(float(row['confidence']), 2),
+        })
+    return insights
+
+
+def paid_vs_free_gaps(df):
+    """
+    Mean rating gap between paid and free apps on each platform (Welch z-test).
+    """
+    stats = (
+        df.assign(is_paid=df['Price'].fillna(0) > 0)
+        .groupby(['Platform', 'is_paid'])['Rating']
+        .agg(['mean', 'var', 'count'])
+        .unstack('is_paid')
+    )
+    if ('count', True) not in stats.columns or ('count', False) not in stats.columns:
+        return []
+    stats = stats[(stats[('count', True)] >= 3) & (stats[('count', False)] >= 3)]
+
+    delta = stats[('mean', True)] - stats[('mean', False)]
+    std_err = np.sqrt(stats[('var', True)] / stats[('count', True)] + stats[('var', False)] / stats[('count', False)])
+    z = delta / std_err.replace(0, np.nan)
+    confidence = pd.Series(_confidence_from_z(z.fillna(0)), index=stats.index)
+
+    insights = []
+    for platform in stats.index[(delta.abs() >= MIN_RATING_DELTA).values]:
+        paid_mean, free_mean = stats.loc[platform, ('mean', True)], stats.loc[platform, ('mean', False)]
+        better = "Paid" if paid_mean > free_mean else "Free"
+        insights.append({
+            "insight_type": "Monetization Gap",
+            "title": f"{better} Apps Rate Higher on {platform}",
+            "summary": (f"On {platform}, paid apps average {paid_mean:.2f} stars versus {free_mean:.2f} "
+                        f"for free apps."),
+            "supporting_data": {
+                "platform": platform,
+                "paid_mean_rating": round(float(paid_mean), 2),
+                "free_mean_rating": round(float(free_mean), 2),
+                "paid_apps": int(stats.loc[platform, ('count', True)]),
+                "free_apps": int(stats.loc[platform, ('count', False)]),
+            },
+            "recommendation": ("Consider a premium tier, since paying users rate their apps more favourably."
+                               if better == "Paid" else
+                               "Keep a strong free offering; paid apps are not earning better ratings."),
+            "confidence_score": round(float(confidence.loc[platform]), 2),
+        })
+    return insights
+
+
+def review_count_skew(df):
+    """
+    How concentrated review volume is in the top apps of each platform.
+    """
+    reviews = df[df['Reviews'] > 0]
+    insights = []
+    for platform, counts in reviews.groupby('Platform')['Reviews']:
+        n = len(counts)
+        if n < 10:
+            continue
+        top_n = int(np.ceil(n * TOP_SHARE_FRACTION))
+        top_share = counts.nlargest(top_n).sum() / counts.sum()
+        if top_share < MIN_TOP_SHARE:
+            continue
+        insights.append({
+            "insight_type": "Review Concentration",
+            "title": f"Review Volume on {platform} Is Concentrated in a Few Apps",
+            "summary": (f"The top {top_n} of {n} {platform} apps hold {top_share:.0%} of all reviews "
+                        f"(skewness {counts.skew():.1f})."),
+            "supporting_data": {
+                "platform": platform,
+                "apps": n,
+                "top_apps": top_n,
+                "top_review_share": round(float(top_share), 3),
+                "review_skewness": round(float(counts.skew()), 2),
+            },
+            "recommendation": f"Benchmark against the long tail on {platform}, not only the few dominant apps.",
+            "confidence_score": round(float(_confidence_from_n(n)), 2),
+        })
+    return insights
+
+
+def generate_local_insights(df, max_per_rule=5):
+    """
+    Runs every rule over the combined dataset and returns candidate insights
+    in the same schema as generate_insights(). Each rule scores confidence on
+    its own scale, so candidates are ranked within their rule and interleaved
+    round-robin (every rule's best, then every rule's second best, ...): any
+    prefix of the list holds a fair share of every rule.
+    """
+    by_confidence = lambda insight: insight['confidence_score']
+    rules = [
+        sorted(rule, key=by_confidence, reverse=True)
+        for rule in (cross_platform_deltas(df, max_per_rule), category_outliers(df, max_per_rule),
+                     paid_vs_free_gaps(df), review_count_skew(df))
+    ]
+    candidates = []
+    for rank in range(max(map(len, rules), default=0)):
+        candidates += sorted((rule[rank] for rule in rules if rank < len(rule)), key=by_confidence, reverse=True)
+    for i, insight in enumerate(candidates, start=1):
+        insight['insight_id'] = f"LR-{i:03d}"
+    # Keep the key order used by the LLM schema
+    keys = ["insight_id", "insight_type", "title", "summary", "supporting_data", "recommendation", "confidence_score"]
+    return [{key: insight[key] for key in keys} for insight in candidates]
+
+
+if __name__ == '__main__':
+    combined_data_path = os.path.join('data', 'processed', 'combined_market_data.csv')
+    insights = generate_local_insights(pd.read_csv(combined_data_path))
+    print(json.dumps(insights, indent=4))
+    print(f"Generated {len(insights)} local candidate insights.")
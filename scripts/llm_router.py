@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+from openai import OpenAI, APITimeoutError
+from dotenv import load_dotenv
+from publish import write_json_atomic
+
+# --- CONFIGURATION ---
+load_dotenv()
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Set GROQ_BASE_URL to a local stub (scripts/llm_stub_server.py) to test routing offline
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+MODEL_TIERS = {
+    "large": "openai/gpt-oss-120b",
+    "small": "openai/gpt-oss-20b",
+}
+# Which tier a slow request is hedged with
+HEDGE_TIER = {
+    "large": "small",
+    "small": "small",
+}
+# task -> (model tier, latency budget in seconds)
+TASK_ROUTES = {
+    "insight_phrasing": ("large", 60.0),
+    "nl_to_sql": ("large", 20.0),
+    "ad_headlines": ("small", 15.0),
+    "seo_description": ("small", 10.0),
+}
+
+STATS_PATH = os.path.join('data', 'llm_latency_stats.json')
+STATS_WINDOW = 200          # latencies kept per model
+MIN_SAMPLES_FOR_P95 = 20    # below this we hedge at half the budget
+
+
+class LatencyStats:
+    """
+    Rolling per-model latency samples, persisted to JSON between runs so the
+    hedge delay is tuned from real traffic.
+    """
+
+    def __init__(self, path=STATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._errors = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                # Unreadable stats only cost the hedge tuning; start over rather than disable the router
+                print(f"Warning: ignoring unreadable latency stats in '{path}'")
+                saved = {}
+            for model, entry in saved.items():
+                self._samples[model] = deque(entry.get('latencies', []), maxlen=STATS_WINDOW)
+                self._errors[model] = entry.get('errors', 0)
+
+    def record(self, model, seconds, ok=True):
+        with self._lock:
+            if ok:
+                self._samples.setdefault(model, deque(maxlen=STATS_WINDOW)).append(round(seconds, 3))
+            else:
+                self._errors[model] = self._errors.get(model, 0) + 1
+
+    def percentile(self, model, q):
+        """Returns the q-th latency percentile for a model, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < MIN_SAMPLES_FOR_P95:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+    def summary(self):
+        models = set(self._samples) | set(self._errors)
+        return {
+            model: {
+                "count": len(self._samples.get(model, ())),
+                "errors": self._errors.get(model, 0),
+                "p50": self.percentile(model, 50),
+                "p95": self.percentile(model, 95),
+                "p99": self.percentile(model, 99),
+            }
+            for model in sorted(models)
+        }
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                model: {"latencies": list(self._samples.get(model, ())), "errors": self._errors.get(model, 0)}
+                for model in set(self._samples) | set(self._errors)
+            }
+        # Shared by concurrent stages and the dashboard, so never leave a half-written file
+        write_json_atomic(self.path, data)
+
+
+class LLMRouter:
+    """
+    Routes each LLM task to a model tier under a latency budget.
+
+    A request that has not answered by the model's observed p95 latency is
+    hedged with a duplicate request to the hedge tier's model, and whichever
+    answers first wins. If a model's p95 already exceeds the task budget, the
+    task goes straight to the hedge tier.
+    """
+
+    def __init__(self, client=None, stats_path=STATS_PATH):
+        self._client = client
+        self.stats = LatencyStats(stats_path)
+
+    @property
+    def client(self):
+        if self._client is None:
+            if not GROQ_API_KEY:
+                raise ValueError("GROQ_API_KEY not found in .env file. Please add it.")
+            # Retries are handled by hedging, not by the SDK
+            self._client = OpenAI(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, max_retries=0)
+        return self._client
+
+    def _pick_models(self, task):
+        tier, budget = TASK_ROUTES[task]
+        primary = MODEL_TIERS[tier]
+        hedge = MODEL_TIERS[HEDGE_TIER[tier]]
+        primary_p95 = self.stats.percentile(primary, 95)
+        if primary_p95 is not None and primary_p95 > budget and primary != hedge:
+            print(f"  -> Routing '{task}' to {hedge}: {primary} p95 {primary_p95:.1f}s exceeds the {budget:.0f}s budget")
+            primary = hedge
+        hedge_after = self.stats.percentile(primary, 95) or budget / 2
+        return primary, hedge, budget, min(hedge_after, budget)
+
+    def _settle(self, attempt, ok=True, latency=True):
+        """Records an attempt's outcome exactly once, whichever of the caller or the request gets there first."""
+        with attempt['lock']:
+            if attempt['settled']:
+                return
+            attempt['settled'] = True
+        if latency:
+            self.stats.record(attempt['model'], time.perf_counter() - attempt['start'])
+        if not ok:
+            self.stats.record(attempt['model'], 0, ok=False)
+
+    def _call(self, attempt, messages, timeout, params, results):
+        try:
+            response = self.client.chat.completions.create(
+                model=attempt['model'], messages=messages, timeout=timeout, **params
+            )
+        except Exception as e:
+            # A timeout is a tail latency the hedge delay must learn from, not just an error
+            self._settle(attempt, ok=False, latency=isinstance(e, APITimeoutError))
+            results.put((attempt, None, e))
+            return
+        self._settle(attempt)
+        results.put((attempt, response.choices[0].message.content, None))
+
+    def _start(self, model, messages, timeout, params, results):
+        attempt = {'model': model, 'start': time.perf_counter(), 'lock': threading.Lock(), 'settled': False}
+        # Daemon threads: a losing request must not keep the process alive after complete() returns
+        threading.Thread(target=self._call, args=(attempt, messages, timeout, params, results), daemon=True).start()
+        return attempt
+
+    def complete(self, task, messages, **params):
+        """
+        Runs one chat completion for the task and returns the message content.
+        Extra keyword arguments (temperature, max_tokens, ...) go to the API.
+        """
+        primary, hedge, budget, hedge_after = self._pick_models(task)
+        deadline = time.perf_counter() + budget
+        results = queue.Queue()
+        attempts = [self._start(primary, messages, budget, params, results)]
+
+        try:
+            first = results.get(timeout=hedge_after)
+        except queue.Empty:
+            first = None
+        outstanding = len(attempts) - (first is not None)
+        error = first[2] if first else None
+
+        try:
+            if first is not None and error is None:
+                return first[1]
+            print(f"  -> No answer from {primary} after {hedge_after:.1f}s, hedging with {hedge}")
+            remaining = max(deadline - time.perf_counter(), 0.1)
+            attempts.append(self._start(hedge, messages, remaining, params, results))
+            outstanding += 1
+
+            while outstanding:
+                try:
+                    _, content, item_error = results.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                outstanding -= 1
+                if item_error is None:
+                    return content
+                error = item_error
+        finally:
+            # Requests still in flight are abandoned; their elapsed time is a lower bound on their latency
+            for attempt in attempts:
+                self._settle(attempt)
+            self.stats.save()
+
+        if error is not None:
+            raise error
+        raise TimeoutError(f"No LLM answer for '{task}' within its {budget:.0f}s budget")
+
+
+_default_router = None
+
+def get_router():
+    """Shared router so every call in a process feeds the same latency stats."""
+    global _default_router
+    if _default_router is None:
+        _default_router = LLMRouter()
+    return _default_router
+
+
+if __name__ == '__main__':
+    print(json.dumps(LatencyStats().summary(), indent=4))
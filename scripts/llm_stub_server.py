@@ -0,0 +1,71 @@
+import json
+import time
+import random
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# A local stand-in for the Groq OpenAI-compatible API with injectable latency,
+# for exercising llm_router.py without network access or API credits.
+#
+#   python scripts/llm_stub_server.py --latency openai/gpt-oss-120b=2 --tail-rate 0.1 --tail-latency 30
+#   GROQ_API_KEY=stub GROQ_BASE_URL=http://127.0.0.1:8765/v1 python scripts/03_insight_generation.py
+
+
+def make_handler(latencies, default_latency, tail_rate, tail_latency, response_text):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.endswith('/chat/completions'):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            model = body.get('model', 'stub')
+
+            delay = latencies.get(model, default_latency)
+            if random.random() < tail_rate:
+                delay = tail_latency
+            time.sleep(delay)
+
+            content = response_text if response_text is not None else f"[{model}] " + body['messages'][-1]['content'][:200]
+            payload = json.dumps({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }).encode('utf-8')
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the router gave up on this request (hedged or timed out)
+
+        def log_message(self, format, *args):
+            print(f"  [stub] {self.address_string()} {format % args}")
+
+    return StubHandler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat server with injected latency.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', action='append', default=[], metavar='MODEL=SECONDS',
+                        help="Base latency for one model; may be repeated.")
+    parser.add_argument('--default-latency', type=float, default=0.2)
+    parser.add_argument('--tail-rate', type=float, default=0.0, help="Fraction of requests that get the tail latency.")
+    parser.add_argument('--tail-latency', type=float, default=30.0)
+    parser.add_argument('--response', default=None, help="Fixed response text (defaults to echoing the prompt).")
+    args = parser.parse_args()
+
+    latencies = {model: float(seconds) for model, seconds in (item.split('=', 1) for item in args.latency)}
+    handler = make_handler(latencies, args.default_latency, args.tail_rate, args.tail_latency, args.response)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), handler)
+    print(f"--- LLM stub listening on http://127.0.0.1:{args.port}/v1 ---")
+    server.serve_forever()
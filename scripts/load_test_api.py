@@ -0,0 +1,112 @@
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse
+
+# Load test for api_server.py: N threads, each on its own keep-alive connection,
+# cycling through the endpoints for a fixed duration.
+#
+#   python api_server.py &
+#   python scripts/load_test_api.py --threads 16 --duration 15
+
+DEFAULT_PATHS = [
+    '/insights',
+    '/d2c/insights',
+    '/d2c/creative',
+    '/apps?page=1&page_size=50',
+    '/apps?platform=iOS&min_rating=4&sort=-Reviews',
+]
+
+
+def _worker(base_url, paths, deadline, use_etags, use_gzip, results, lock):
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    etags = {}
+    latencies, statuses = [], {}
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        headers = {}
+        if use_gzip:
+            headers['Accept-Encoding'] = 'gzip'
+        if use_etags and path in etags:
+            headers['If-None-Match'] = etags[path]
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+            if response.getheader('ETag'):
+                etags[path] = response.getheader('ETag')
+        except (OSError, http.client.HTTPException):
+            status = 'error'
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    conn.close()
+    with lock:
+        results['latencies'].extend(latencies)
+        for status, count in statuses.items():
+            results['statuses'][status] = results['statuses'].get(status, 0) + count
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+def run_load_test(base_url, threads=8, duration=10.0, paths=None, use_etags=True, use_gzip=True):
+    """Runs the load test and returns a dict with requests/sec, latency percentiles and status counts."""
+    paths = paths or DEFAULT_PATHS
+    results = {'latencies': [], 'statuses': {}}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    workers = [
+        threading.Thread(target=_worker, args=(base_url, paths, deadline, use_etags, use_gzip, results, lock))
+        for _ in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(results['latencies'])
+    if not latencies:
+        return {'requests': 0, 'statuses': results['statuses']}
+    return {
+        'requests': len(latencies),
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p95_ms': _percentile(latencies, 95) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+        'statuses': results['statuses'],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test the read-only insights API.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run.")
+    parser.add_argument('--no-etags', action='store_true', help="Never send If-None-Match.")
+    parser.add_argument('--no-gzip', action='store_true', help="Never ask for gzip.")
+    parser.add_argument('--path', action='append', default=None, help="Endpoint to hit; may be repeated.")
+    args = parser.parse_args()
+
+    print(f"--- Load testing {args.url} with {args.threads} threads for {args.duration:.0f}s ---")
+    report = run_load_test(args.url, args.threads, args.duration, args.path,
+                           use_etags=not args.no_etags, use_gzip=not args.no_gzip)
+    if not report['requests']:
+        print(f"No requests completed. Statuses: {report['statuses']}")
+    else:
+        print(f"Requests:      {report['requests']}")
+        print(f"Requests/sec:  {report['requests_per_sec']:.1f}")
+        print(f"Latency p50:   {report['p50_ms']:.2f} ms")
+        print(f"Latency p95:   {report['p95_ms']:.2f} ms")
+        print(f"Latency p99:   {report['p99_ms']:.2f} ms")
+        print(f"Status codes:  {report['statuses']}")
@@ -0,0 +1,240 @@
+import os
+import re
+import sys
+import sqlite3
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Processed tables the LLM may query; only their schema and column statistics go in the prompt
+TABLE_SOURCES = {
+    'apps': os.path.join('data', 'processed', 'combined_market_data.csv'),
+    'google_play': os.path.join('data', 'processed', 'google_play_cleaned.csv'),
+    'ios_apps': os.path.join('data', 'processed', 'ios_apps_data.csv'),
+}
+D2C_STORE_PATH = os.path.join('phase5_extension', 'd2c_kpi_store.sqlite')
+MAX_ROWS = 1000
+TOP_VALUES = 8  # most common values listed per text column
+
+FORBIDDEN_SQL = re.compile(
+    r'\b(ATTACH|DETACH|PRAGMA|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|VACUUM|REINDEX|ANALYZE|BEGIN|COMMIT)\b',
+    re.IGNORECASE,
+)
+
+
+def load_tables():
+    """Loads every processed table that exists on disk, keyed by SQL table name."""
+    tables = {name: pd.read_csv(path) for name, path in TABLE_SOURCES.items() if os.path.exists(path)}
+    if os.path.exists(D2C_STORE_PATH):
+        with sqlite3.connect(D2C_STORE_PATH) as conn:
+            tables['d2c_daily_kpis'] = pd.read_sql("SELECT * FROM daily_kpis", conn)
+    return tables
+
+
+def _read_only_authorizer(table_names):
+    def authorize(action, arg1, arg2, db_name, trigger):
+        if action == sqlite3.SQLITE_READ:
+            # Only the loaded tables, never sqlite_master and friends
+            return sqlite3.SQLITE_OK if arg1 in table_names else sqlite3.SQLITE_DENY
+        allowed = (sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE)
+        return sqlite3.SQLITE_OK if action in allowed else sqlite3.SQLITE_DENY
+    return authorize
+
+
+def build_database(tables):
+    """
+    Copies the tables into an in-memory SQLite database that only allows
+    reads of those tables once loaded, so even SQL that slips past
+    validate_sql() cannot write or read the schema tables.
+    """
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    for name, df in tables.items():
+        df.to_sql(name, conn, index=False)
+    conn.set_authorizer(_read_only_authorizer(set(tables)))
+    return conn
+
+
+def describe_schema(tables):
+    """
+    Compact description of each table: columns, types and summary statistics.
+    Its size depends on the number of columns, not on the number of rows.
+    """
+    lines = []
+    for name, df in tables.items():
+        lines.append(f"TABLE {name} ({len(df)} rows)")
+        for column in df.columns:
+            series = df[column]
+            null_share = series.isna().mean()
+            if pd.api.types.is_numeric_dtype(series):
+                lines.append(
+                    f"  \"{column}\" NUMERIC: min={series.min()}, max={series.max()}, "
+                    f"mean={series.mean():.2f}, nulls={null_share:.0%}"
+                )
+            else:
+                top = series.dropna().astype(str).value_counts().head(TOP_VALUES).index.tolist()
+                lines.append(
+                    f"  \"{column}\" TEXT: {series.nunique()} distinct, nulls={null_share:.0%}, "
+                    f"common values={top}"
+                )
+    return "\n".join(lines)
+
+
+def _strip_comments(sql):
+    """
+    Removes -- and /* */ comments that are outside string literals and quoted
+    identifiers. Returns (sql without comments, same text with string literals blanked).
+    """
+    kept, code = [], []
+    i, n = 0, len(sql)
+    while i < n:
+        if sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = n if end == -1 else end
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            kept.append(' ')
+            code.append(' ')
+        elif sql[i] in "'\"`[":
+            close = ']' if sql[i] == '[' else sql[i]
+            j = i + 1
+            while j < n:
+                if sql[j] == close:
+                    # A doubled quote inside the literal is an escaped quote
+                    if close != ']' and sql.startswith(close * 2, j):
+                        j += 2
+                        continue
+                    break
+                j += 1
+            token = sql[i:j + 1]
+            kept.append(token)
+            # Keywords inside string literals (e.g. LIKE '%Update%') are just data
+            code.append("''" if sql[i] == "'" else token)
+            i = j + 1
+        else:
+            kept.append(sql[i])
+            code.append(sql[i])
+            i += 1
+    return ''.join(kept).strip(), ''.join(code).strip()
+
+
+IDENTIFIER = r'"[^"]+"|`[^`]+`|\[[^\]]+\]|\w+'
+_TABLE_REF = re.compile(rf'\s*({IDENTIFIER}|\()')
+_ALIAS = re.compile(
+    rf'\s+(?:AS\s+)?(?!(?:WHERE|JOIN|ON|USING|GROUP|ORDER|LIMIT|HAVING|UNION|EXCEPT|INTERSECT|WINDOW'
+    rf'|LEFT|RIGHT|INNER|OUTER|CROSS|NATURAL|FULL)\b)({IDENTIFIER})',
+    re.IGNORECASE,
+)
+
+
+def _skip_parens(code, pos):
+    """Index just past the parenthesis that closes the one at `pos`."""
+    depth = 0
+    for i in range(pos, len(code)):
+        depth += {'(': 1, ')': -1}.get(code[i], 0)
+        if depth == 0:
+            return i + 1
+    return len(code)
+
+
+def _referenced_tables(code):
+    """Every table named after FROM or JOIN, including each entry of a comma-separated FROM list."""
+    names = set()
+    for match in re.finditer(r'\b(?:FROM|JOIN)\b', code, re.IGNORECASE):
+        pos = match.end()
+        while True:
+            ref = _TABLE_REF.match(code, pos)
+            if not ref:
+                break
+            if ref.group(1) == '(':
+                # Subquery: its own FROM clauses are found by the outer loop
+                pos = _skip_parens(code, ref.start(1))
+            else:
+                names.add(ref.group(1).strip('"`[]'))
+                pos = ref.end()
+                if code.startswith('(', pos):
+                    # Table-valued function arguments
+                    pos = _skip_parens(code, pos)
+            alias = _ALIAS.match(code, pos)
+            if alias:
+                pos = alias.end()
+            comma = re.compile(r'\s*,').match(code, pos)
+            if not comma:
+                break
+            pos = comma.end()
+    return names
+
+
+def validate_sql(sql, table_names):
+    """
+    Accepts a single read-only SELECT over the known tables and returns it
+    without comments. Raises ValueError otherwise. The row limit is applied
+    when the query is fetched (see answer_question).
+    """
+    sql = re.sub(r'^```(?:sql)?\s*|\s*```$', '', sql.strip(), flags=re.IGNORECASE)
+    sql, code = _strip_comments(sql)
+    sql, code = sql.rstrip(';').strip(), code.rstrip(';').strip()
+    if not sql:
+        raise ValueError("The LLM returned an empty query.")
+    if ';' in code:
+        raise ValueError("Only a single SQL statement is allowed.")
+    if not re.match(r'^(SELECT|WITH)\b', code, re.IGNORECASE):
+        raise ValueError("Only SELECT queries are allowed.")
+    forbidden = FORBIDDEN_SQL.search(code)
+    if forbidden:
+        raise ValueError(f"Forbidden SQL keyword: {forbidden.group(0).upper()}")
+
+    # CTE names, including recursive ones with a column list: c(x) AS (...)
+    cte_names = set(re.findall(r'\b(\w+)\s*(?:\([^()]*\))?\s+AS\s+(?:NOT\s+)?(?:MATERIALIZED\s+)?\(', code, re.IGNORECASE))
+    unknown = _referenced_tables(code) - set(table_names) - cte_names
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(sorted(unknown))}")
+    return sql
+
+
+def question_to_sql(question, schema, complete=None):
+    """
+    Asks the LLM to translate a question into SQLite SQL, given only the
+    schema description. `complete` takes a messages list and returns text;
+    it defaults to the shared LLM router and can be a stub in tests.
+    """
+    if complete is None:
+        from llm_router import get_router
+        complete = lambda messages: get_router().complete("nl_to_sql", messages, temperature=0, max_tokens=512)
+
+    prompt = f"""
+    You are a data analyst. Translate the question into ONE SQLite SELECT query over the tables below.
+    Quote column names that contain spaces with double quotes. Use only the listed tables and columns.
+    Respond with ONLY the SQL query, no explanation and no markdown.
+
+    Schema and column statistics:
+    {schema}
+
+    Question: {question}
+    """
+    return complete([{"role": "user", "content": prompt}])
+
+
+def answer_question(question, conn, tables, schema=None, complete=None):
+    """
+    Returns (sql, DataFrame) for a natural-language question: the LLM writes
+    the SQL from the schema alone, and the query runs locally.
+    """
+    schema = schema or describe_schema(tables)
+    sql = validate_sql(question_to_sql(question, schema, complete), tables.keys())
+    cursor = conn.execute(sql)
+    try:
+        rows = cursor.fetchmany(MAX_ROWS)
+    finally:
+        cursor.close()
+    return sql, pd.DataFrame(rows, columns=[column[0] for column in cursor.description])
+
+
+if __name__ == '__main__':
+    tables = load_tables()
+    if not tables:
+        print("Error: No processed tables found. Please run the pipeline scripts first.")
+        sys.exit(1)
+    question = ' '.join(sys.argv[1:]) or "Which 5 apps have the most reviews on iOS?"
+    sql, result = answer_question(question, build_database(tables), tables)
+    print(f"SQL: {sql}\n")
+    print(result.to_string(index=False))
@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+# Small marker file the dashboard polls to find out which outputs changed
+VERSIONS_PATH = os.path.join('data', 'versions.json')
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8', newline=None):
+    """
+    Writes to a temporary file next to `path` and renames it into place on
+    success, so readers only ever see the old or the new complete file.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        text_kwargs = {} if 'b' in mode else {'encoding': encoding, 'newline': newline}
+        with os.fdopen(fd, mode, **text_kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates owner-only files
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    with atomic_write(path) as f:
+        json.dump(data, f, **dump_kwargs)
+
+
+def write_csv_atomic(df, path, **to_csv_kwargs):
+    # newline='' lets pandas control line endings, as it does when given a path
+    with atomic_write(path, newline='') as f:
+        df.to_csv(f, **to_csv_kwargs)
+
+
+def version_key(path):
+    """Versions are keyed by '/'-separated relative paths on every platform."""
+    return path.replace(os.sep, '/')
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def read_versions(path=VERSIONS_PATH):
+    if not os.path.exists(path):
+        return {"generation": 0, "files": {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def publish_versions(paths, versions_path=VERSIONS_PATH):
+    """
+    Records the content hash of each output in the version marker and bumps
+    its generation if anything changed. Returns the list of changed paths.
+    Call from a single writer (the scheduler) so updates do not race.
+    """
+    versions = read_versions(versions_path)
+    changed = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        key, digest = version_key(path), file_hash(path)
+        if versions["files"].get(key, {}).get("hash") != digest:
+            versions["files"][key] = {"hash": digest, "published_at": time.time()}
+            changed.append(path)
+    if changed:
+        versions["generation"] += 1
+        write_json_atomic(versions_path, versions, indent=2)
+    return changed
@@ -0,0 +1,200 @@
+import os
+import re
+import json
+import hashlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from jinja2 import Environment, DictLoader, select_autoescape
+from publish import write_json_atomic
+
+# --- CONFIGURATION ---
+REPORTS_DIR = 'reports'
+MANIFEST_PATH = os.path.join(REPORTS_DIR, 'manifest.json')
+# Bump when a template changes so every report is re-rendered once
+TEMPLATE_VERSION = '1'
+# Below this many reports a process pool costs more than it saves
+MIN_JOBS_FOR_POOL = 8
+
+INSIGHT_SECTION_MD = """{% for insight in insights %}
+## {{ insight.title }}
+
+**Insight Type:** {{ insight.insight_type }}
+
+**Summary:** {{ insight.summary }}
+
+**Recommendation:** {{ insight.recommendation }}
+
+**Confidence:** {{ '%.0f' % (insight.confidence_score * 100) }}%
+
+**Supporting Data:**
+```json
+{{ insight.supporting_data | pretty_json }}
+```
+
+---
+
+{% endfor %}"""
+
+TEMPLATES = {
+    'executive.md': """# AI-Powered Market Intelligence Report
+
+This report details key insights generated from the analysis of top mobile applications.
+
+---
+
+{% include 'insight_section.md' %}""",
+
+    'insight_section.md': INSIGHT_SECTION_MD,
+
+    'segment.md': """# {{ heading }}
+
+{{ description }}
+
+{% if stats %}
+| Metric | Value |
+|---|---|
+{% for name, value in stats.items() %}
+| {{ name }} | {{ value }} |
+{% endfor %}
+
+{% endif %}
+---
+
+{% if insights %}
+{% include 'insight_section.md' %}
+{% else %}
+_No insights for this segment in the current run._
+{% endif %}""",
+
+    'segment.html': """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{{ heading }}</title>
+<style>
+body { font-family: sans-serif; max-width: 860px; margin: 2rem auto; line-height: 1.5; }
+table { border-collapse: collapse; } td, th { border: 1px solid #ccc; padding: 4px 10px; }
+pre { background: #f5f5f5; padding: 10px; overflow-x: auto; }
+</style>
+</head>
+<body>
+<h1>{{ heading }}</h1>
+<p>{{ description }}</p>
+{% if stats %}
+<table>
+<tr><th>Metric</th><th>Value</th></tr>
+{% for name, value in stats.items() %}
+<tr><td>{{ name }}</td><td>{{ value }}</td></tr>
+{% endfor %}
+</table>
+{% endif %}
+<hr>
+{% for insight in insights %}
+<section>
+<h2>{{ insight.title }}</h2>
+<p><strong>Insight Type:</strong> {{ insight.insight_type }}</p>
+<p><strong>Summary:</strong> {{ insight.summary }}</p>
+<p><strong>Recommendation:</strong> {{ insight.recommendation }}</p>
+<p><strong>Confidence:</strong> {{ '%.0f' % (insight.confidence_score * 100) }}%</p>
+<pre>{{ insight.supporting_data | pretty_json }}</pre>
+</section>
+<hr>
+{% else %}
+<p><em>No insights for this segment in the current run.</em></p>
+{% endfor %}
+</body>
+</html>
+""",
+}
+
+_env = None
+
+def _get_env():
+    """One compiled Jinja environment per process; templates compile on first use and are cached."""
+    global _env
+    if _env is None:
+        _env = Environment(
+            loader=DictLoader(TEMPLATES),
+            autoescape=select_autoescape(enabled_extensions=('html',), default_for_string=False),
+            trim_blocks=True,
+            keep_trailing_newline=True,
+        )
+        _env.filters['pretty_json'] = lambda data: json.dumps(data, indent=2)
+    return _env
+
+
+def render_to_file(template_name, output_path, context):
+    """
+    Streams a template into a file chunk by chunk, writing to a temporary file
+    first so readers never see a half-written report.
+    """
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = f"{output_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        _get_env().get_template(template_name).stream(**context).dump(f)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def _render_job(job):
+    template_name, output_path, context = job
+    return render_to_file(template_name, output_path, context)
+
+
+def content_hash(template_name, context):
+    payload = json.dumps([TEMPLATE_VERSION, template_name, context], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', str(text).lower()).strip('-') or 'unknown'
+
+
+def market_stats(df):
+    """Display-ready summary stats of a slice of the combined market data (reports and dashboard)."""
+    return {
+        "Apps": f"{len(df):,}",
+        "Average rating": f"{df['Rating'].mean():.2f}",
+        "Total reviews": f"{int(df['Reviews'].fillna(0).sum()):,}",
+        "Paid apps": f"{(df['Price'].fillna(0) > 0).mean():.0%}",
+    }
+
+
+def render_reports(jobs, manifest_path=MANIFEST_PATH, max_workers=None, prune_dir=None):
+    """
+    Renders (template_name, output_path, context) jobs, skipping any report
+    whose inputs hash the same as last time and whose file still exists.
+    Changed reports are rendered across a process pool. With prune_dir, reports
+    under that directory that are in the manifest but no longer among the jobs
+    (e.g. a segment that disappeared) are deleted along with their entries.
+    Returns (rendered_count, skipped_count); raises ValueError if two jobs
+    share an output path.
+    """
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    duplicates = sorted(path for path, count in Counter(job[1] for job in jobs).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Several reports would be written to the same file: {', '.join(duplicates)}")
+
+    hashes = {output_path: content_hash(template_name, context) for template_name, output_path, context in jobs}
+    todo = [job for job in jobs if manifest.get(job[1]) != hashes[job[1]] or not os.path.exists(job[1])]
+
+    if len(todo) >= MIN_JOBS_FOR_POOL:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(_render_job, todo, chunksize=max(1, len(todo) // ((max_workers or os.cpu_count() or 1) * 4))))
+    else:
+        for job in todo:
+            _render_job(job)
+
+    manifest.update(hashes)
+    if prune_dir is not None:
+        prefix = os.path.join(prune_dir, '')
+        for stale_path in [path for path in manifest if path.startswith(prefix) and path not in hashes]:
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+            del manifest[stale_path]
+    write_json_atomic(manifest_path, manifest, indent=2, sort_keys=True)
+    return len(todo), len(jobs) - len(todo)
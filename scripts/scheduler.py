@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from publish import publish_versions, read_versions, version_key, write_json_atomic
+from dashboard_bundle import BUNDLE_PATH
+
+# --- CONFIGURATION ---
+# Long-running refresher for the pipeline outputs. Each stage runs on its own
+# cadence (`every`, in seconds) and/or when one of its inputs is republished
+# with a new content hash. Stages run as subprocesses from the repo root.
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+STATE_PATH = os.path.join('data', 'scheduler_state.json')
+LOG_DIR = os.path.join('data', 'logs')
+RETRY_BASE_SECONDS = 60  # first retry after a failure; doubles per consecutive failure
+
+GOOGLE_PLAY_CLEANED = os.path.join('data', 'processed', 'google_play_cleaned.csv')
+IOS_DATA = os.path.join('data', 'processed', 'ios_apps_data.csv')
+COMBINED_DATA = os.path.join('data', 'processed', 'combined_market_data.csv')
+INSIGHTS = 'insights.json'
+D2C_INSIGHTS = os.path.join('phase5_extension', 'd2c_insights.json')
+D2C_CREATIVE = os.path.join('phase5_extension', 'd2c_creative_outputs.json')
+
+
+class Stage:
+    def __init__(self, name, commands, outputs, every=None, inputs=(), after=(), timeout=3600):
+        self.name = name
+        self.commands = commands  # argument lists, run in order with the current interpreter
+        self.outputs = outputs    # files published to the version marker after a successful run
+        self.every = every
+        self.inputs = inputs      # files whose new versions trigger a run
+        self.after = after        # stages that must not be due or running when this one starts
+        self.timeout = timeout
+
+
+STAGES = [
+    Stage('api_sweep',
+          [['scripts/01_data_cleaning.py'], ['scripts/02_api_integration.py', '--changed-only']],
+          [GOOGLE_PLAY_CLEANED, IOS_DATA, COMBINED_DATA], every=3600),
+    Stage('d2c_kpis', [['phase5_extension/01_d2c_analysis.py', '--incremental']],
+          [D2C_INSIGHTS], every=3600),
+    # Reads the sweep's output but should not rerun on every hourly sweep, so it is ordered, not triggered
+    Stage('insights', [['scripts/03_insight_generation.py', '--changed-only']],
+          [INSIGHTS], every=86400, after=['api_sweep']),
+    Stage('report', [['scripts/04_report_automation.py', '--segments']],
+          ['executive_report.md'], inputs=[INSIGHTS, COMBINED_DATA, D2C_INSIGHTS]),
+    Stage('creative', [['phase5_extension/02_creative_generation.py']],
+          [D2C_CREATIVE], inputs=[D2C_INSIGHTS], timeout=600),
+    Stage('bundle', [['scripts/dashboard_bundle.py']],
+          [BUNDLE_PATH], inputs=[INSIGHTS, COMBINED_DATA, D2C_INSIGHTS, D2C_CREATIVE], timeout=600),
+]
+
+
+class Scheduler:
+    """
+    Runs due stages on a bounded thread pool (at most `max_concurrent` at a
+    time, never two runs of the same stage) and publishes their outputs to the
+    version marker, which the dashboard polls to reload only what changed.
+    """
+
+    def __init__(self, stages=STAGES, max_concurrent=2, state_path=STATE_PATH):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.state = self._load_state()
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='stage')
+        self._lock = threading.Lock()  # guards state, the running set and the version marker
+        self._running = set()
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def _input_versions(self, stage, versions):
+        return {path: versions['files'].get(version_key(path), {}).get('hash') for path in stage.inputs}
+
+    def _upstream_busy(self, stage, due):
+        # Wait for stages that produce our inputs or that we are ordered after,
+        # so a report is not rendered from half-refreshed data
+        return any(
+            other.name in self._running or other.name in due
+            for other in self.stages.values()
+            if other is not stage and (set(other.outputs) & set(stage.inputs) or other.name in stage.after)
+        )
+
+    def due_stages(self, now=None):
+        now = now or time.time()
+        versions = read_versions()
+        due = []
+        for stage in self.stages.values():
+            if stage.name in self._running:
+                continue
+            state = self.state.get(stage.name, {})
+            failures = state.get('failures', 0)
+            if failures and now - state.get('last_run', 0) < RETRY_BASE_SECONDS * 2 ** (failures - 1):
+                continue
+            on_schedule = stage.every is not None and now - state.get('last_success', 0) >= stage.every
+            inputs = self._input_versions(stage, versions)
+            on_change = any(inputs.values()) and inputs != state.get('input_versions')
+            if on_schedule or on_change or failures:
+                due.append(stage.name)
+        return [name for name in due if not self._upstream_busy(self.stages[name], due)]
+
+    def _run_stage(self, stage):
+        # Record the input versions this run starts from; later changes trigger another run
+        input_versions = self._input_versions(stage, read_versions())
+        started = time.time()
+        ok = True
+        os.makedirs(os.path.join(REPO_ROOT, LOG_DIR), exist_ok=True)
+        with open(os.path.join(REPO_ROOT, LOG_DIR, f'{stage.name}.log'), 'a', encoding='utf-8') as log:
+            for command in stage.commands:
+                log.write(f"\n=== {time.strftime('%Y-%m-%d %H:%M:%S')} {' '.join(command)} ===\n")
+                log.flush()
+                try:
+                    result = subprocess.run([sys.executable, *command], cwd=REPO_ROOT, stdout=log,
+                                            stderr=subprocess.STDOUT, timeout=stage.timeout)
+                    ok = result.returncode == 0
+                except subprocess.TimeoutExpired:
+                    log.write(f"Timed out after {stage.timeout}s\n")
+                    ok = False
+                if not ok:
+                    break
+
+        with self._lock:
+            try:
+                changed = publish_versions(stage.outputs) if ok else []
+                state = self.state.setdefault(stage.name, {})
+                state['last_run'] = started
+                state['duration'] = round(time.time() - started, 1)
+                if ok:
+                    state.update(last_success=started, failures=0, input_versions=input_versions)
+                else:
+                    state['failures'] = state.get('failures', 0) + 1
+                write_json_atomic(self.state_path, self.state, indent=2)
+            finally:
+                self._running.discard(stage.name)
+
+        status = f"published {len(changed)} changed output(s)" if ok else f"failed (see {LOG_DIR}/{stage.name}.log)"
+        print(f"[{time.strftime('%H:%M:%S')}] {stage.name}: {status} in {state['duration']}s")
+
+    def tick(self):
+        """Submits every due stage; returns the names submitted."""
+        with self._lock:
+            due = self.due_stages()
+            self._running.update(due)
+        for name in due:
+            print(f"[{time.strftime('%H:%M:%S')}] {name}: starting")
+            self._pool.submit(self._run_stage, self.stages[name])
+        return due
+
+    def run(self, tick_seconds=30, once=False):
+        """
+        Ticks until interrupted. With once=True, returns as soon as no stage is
+        running or due, i.e. after one full refresh of everything out of date.
+        """
+        with self._lock:
+            # Seed the marker with outputs that already exist, e.g. from manual runs
+            publish_versions([path for stage in self.stages.values() for path in stage.outputs])
+        try:
+            while True:
+                submitted = self.tick()
+                if once and not submitted and not self._running:
+                    break
+                time.sleep(1 if once else tick_seconds)
+        finally:
+            self._pool.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Refresh pipeline outputs on a schedule and publish their versions.")
+    parser.add_argument('--once', action='store_true', help="Run everything that is due, then exit.")
+    parser.add_argument('--tick', type=float, default=30, help="Seconds between checks for due stages.")
+    parser.add_argument('--max-concurrent', type=int, default=2, help="Stages allowed to run at the same time.")
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    print(f"--- Scheduler started: {', '.join(stage.name for stage in STAGES)} ---")
+    Scheduler(max_concurrent=args.max_concurrent).run(tick_seconds=args.tick, once=args.once)
@@ -0,0 +1,200 @@
+import pandas as pd
+import os
+import json
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+from publish import atomic_write, write_json_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows: checkpoint writes are still atomic, just not serialised
+    fcntl = None
+
+# --- CONFIGURATION ---
+# Layout: data/history/source=<source>/snapshot=<YYYYmmddTHHMMSS>/part-0.parquet
+#         data/history/source=<source>/summary.parquet   (one small row per snapshot)
+HISTORY_DIR = os.path.join('data', 'history')
+CHECKPOINTS_PATH = os.path.join(HISTORY_DIR, 'checkpoints.json')
+SNAPSHOT_FORMAT = '%Y%m%dT%H%M%S'
+KEY_COLUMN = 'App'
+TRACKED_COLUMNS = ['Rating', 'Reviews', 'Installs', 'Price']
+
+
+def _source_dir(source):
+    return os.path.join(HISTORY_DIR, f"source={source}")
+
+
+def content_hash(df):
+    """Hash of a dataset's columns and values, used to skip snapshots identical to the latest one."""
+    digest = hashlib.sha256('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def write_snapshot(source, df, snapshot_id=None):
+    """
+    Saves a dated, columnar copy of a cleaned dataset and appends its
+    summary row, which is all the dashboard needs to draw trends.
+    If the data is identical to the latest snapshot nothing is written.
+    Returns the id of the new snapshot, or of the latest one when skipped.
+    """
+    summary_path = os.path.join(_source_dir(source), 'summary.parquet')
+    data_hash = content_hash(df)
+    previous = pd.read_parquet(summary_path) if os.path.exists(summary_path) else None
+    if previous is not None and len(previous) and 'content_hash' in previous.columns:
+        latest = previous.sort_values('snapshot').iloc[-1]
+        if latest['content_hash'] == data_hash and latest['snapshot'] in list_snapshots(source):
+            print(f"{source} is unchanged since snapshot '{latest['snapshot']}'; no new snapshot written.")
+            return latest['snapshot']
+
+    snapshot_id = snapshot_id or datetime.now().strftime(SNAPSHOT_FORMAT)
+    partition_dir = os.path.join(_source_dir(source), f"snapshot={snapshot_id}")
+    os.makedirs(partition_dir, exist_ok=True)
+    with atomic_write(os.path.join(partition_dir, 'part-0.parquet'), 'wb') as f:
+        df.to_parquet(f, index=False)
+
+    summary_row = pd.DataFrame([{
+        'snapshot': snapshot_id,
+        'snapshot_time': datetime.strptime(snapshot_id, SNAPSHOT_FORMAT),
+        'apps': len(df),
+        'mean_rating': float(df['Rating'].mean()),
+        'total_reviews': int(pd.to_numeric(df['Reviews'], errors='coerce').fillna(0).sum()),
+        'total_installs': int(pd.to_numeric(df['Installs'], errors='coerce').fillna(0).sum()) if 'Installs' in df else 0,
+        'paid_share': float((pd.to_numeric(df['Price'], errors='coerce').fillna(0) > 0).mean()),
+        'content_hash': data_hash,
+    }])
+    if previous is not None:
+        summary_row = pd.concat([previous[previous['snapshot'] != snapshot_id], summary_row], ignore_index=True)
+    # The dashboard reads the summary while we write it, so swap it in whole
+    with atomic_write(summary_path, 'wb') as f:
+        summary_row.to_parquet(f, index=False)
+
+    print(f"Snapshot '{snapshot_id}' of {source} ({len(df)} rows) saved to: {partition_dir}")
+    return snapshot_id
+
+
+def list_snapshots(source):
+    """Snapshot ids for a source, oldest first."""
+    if not os.path.isdir(_source_dir(source)):
+        return []
+    return sorted(
+        name.split('=', 1)[1] for name in os.listdir(_source_dir(source)) if name.startswith('snapshot=')
+    )
+
+
+def load_snapshot(source, snapshot_id, columns=None):
+    path = os.path.join(_source_dir(source), f"snapshot={snapshot_id}", 'part-0.parquet')
+    return pd.read_parquet(path, columns=columns)
+
+
+def load_summary(source):
+    """Per-snapshot summary rows for trend charts, or None if there is no history yet."""
+    summary_path = os.path.join(_source_dir(source), 'summary.parquet')
+    return pd.read_parquet(summary_path) if os.path.exists(summary_path) else None
+
+
+def _hash_index(df):
+    """
+    Indexes a snapshot by a 64-bit hash of the app key, with a second hash of
+    the tracked columns so changed rows are found without comparing values.
+    """
+    df = df.drop_duplicates(subset=[KEY_COLUMN], keep='first')
+    tracked = [column for column in TRACKED_COLUMNS if column in df.columns]
+    # Hash as floats so int/float dtype drift between snapshots is not a change
+    values = df[tracked].apply(pd.to_numeric, errors='coerce').astype(float)
+    return pd.DataFrame({
+        KEY_COLUMN: df[KEY_COLUMN].values,
+        'row_hash': pd.util.hash_pandas_object(values, index=False).values,
+        **{column: values[column].values for column in tracked},
+    }, index=pd.util.hash_pandas_object(df[KEY_COLUMN], index=False).values)
+
+
+def diff_snapshots(old_df, new_df):
+    """
+    Compares two snapshots keyed by app. Returns a dict with the lists of
+    'new' and 'removed' app names and a 'changed' DataFrame holding the old
+    and new values of the tracked columns for apps whose values moved.
+    """
+    old_index, new_index = _hash_index(old_df), _hash_index(new_df)
+
+    added = new_index.index.difference(old_index.index)
+    removed = old_index.index.difference(new_index.index)
+    common = new_index.index.intersection(old_index.index)
+    moved = common[new_index.loc[common, 'row_hash'].values != old_index.loc[common, 'row_hash'].values]
+
+    tracked = [column for column in TRACKED_COLUMNS if column in new_index.columns and column in old_index.columns]
+    changed = new_index.loc[moved, [KEY_COLUMN]].copy()
+    for column in tracked:
+        changed[f"{column}_old"] = old_index.loc[moved, column].values
+        changed[f"{column}_new"] = new_index.loc[moved, column].values
+
+    return {
+        'new': new_index.loc[added, KEY_COLUMN].tolist(),
+        'removed': old_index.loc[removed, KEY_COLUMN].tolist(),
+        'changed': changed.reset_index(drop=True),
+    }
+
+
+def changes_since(source, since_snapshot):
+    """
+    Diff between a past snapshot and the latest one. With no past snapshot
+    every app counts as new. Returns (latest_snapshot_id, diff) or
+    (None, None) if the source has no history.
+    """
+    snapshots = list_snapshots(source)
+    if not snapshots:
+        return None, None
+    latest = snapshots[-1]
+    new_df = load_snapshot(source, latest)
+    if since_snapshot is None or since_snapshot not in snapshots:
+        old_df = new_df.iloc[0:0]
+    elif since_snapshot == latest:
+        old_df = new_df
+    else:
+        old_df = load_snapshot(source, since_snapshot)
+    return latest, diff_snapshots(old_df, new_df)
+
+
+def changed_apps(diff):
+    """App names that are new or whose tracked values changed."""
+    return set(diff['new']) | set(diff['changed'][KEY_COLUMN])
+
+
+def get_checkpoint(consumer):
+    """The snapshot ids a pipeline stage last processed, e.g. {'google_play': '2025...'}."""
+    if not os.path.exists(CHECKPOINTS_PATH):
+        return {}
+    with open(CHECKPOINTS_PATH, 'r') as f:
+        return json.load(f).get(consumer, {})
+
+
+@contextmanager
+def _checkpoints_lock():
+    # Stages that overlap (e.g. api_sweep and insights) must not lose each other's update
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    with open(CHECKPOINTS_PATH + '.lock', 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def set_checkpoint(consumer, snapshots):
+    with _checkpoints_lock():
+        checkpoints = {}
+        if os.path.exists(CHECKPOINTS_PATH):
+            with open(CHECKPOINTS_PATH, 'r') as f:
+                checkpoints = json.load(f)
+        checkpoints[consumer] = snapshots
+        write_json_atomic(CHECKPOINTS_PATH, checkpoints, indent=4)
+
+
+if __name__ == '__main__':
+    for source in ('google_play', 'ios'):
+        snapshots = list_snapshots(source)
+        print(f"--- {source}: {len(snapshots)} snapshots ---")
+        if len(snapshots) >= 2:
+            _, diff = changes_since(source, snapshots[-2])
+            print(f"{len(diff['new'])} new, {len(diff['removed'])} removed, {len(diff['changed'])} changed "
+                  f"between {snapshots[-2]} and {snapshots[-1]}")
+            print(diff['changed'].head(10))
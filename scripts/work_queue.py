@@ -0,0 +1,184 @@
+import sqlite3
+import json
+import os
+import time
+import socket
+from contextlib import contextmanager
+
+
+class WorkQueue:
+    """
+    A durable work queue backed by a single SQLite file, no broker needed.
+
+    Workers lease items for a visibility timeout. If a worker crashes, its
+    lease expires and the item becomes visible to other workers again. Any
+    process that can open the file can take part, including processes on
+    other machines sharing the filesystem; for that reason the queue uses
+    SQLite's rollback journal rather than WAL, which needs shared memory.
+    """
+
+    def __init__(self, db_path, visibility_timeout=300, max_attempts=5):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT UNIQUE NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    available_at REAL,
+                    result TEXT,
+                    error TEXT,
+                    updated_at REAL
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(items)")}
+            if 'available_at' not in columns:
+                # Queue files created before release() existed
+                conn.execute("ALTER TABLE items ADD COLUMN available_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_items_status ON items (status, lease_expires)")
+
+    @contextmanager
+    def _connect(self):
+        # isolation_level=None lets us issue BEGIN IMMEDIATE ourselves;
+        # closing without COMMIT rolls back a half-finished transaction
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, payloads, key_field=None):
+        """
+        Adds payloads (JSON-serializable dicts) to the queue. Items whose key
+        is already queued are ignored, so re-running an enqueue is safe.
+        Returns the number of new items.
+        """
+        now = time.time()
+        rows = [
+            (str(p[key_field]) if key_field else json.dumps(p, sort_keys=True), json.dumps(p), now)
+            for p in payloads
+        ]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO items (key, payload, updated_at) VALUES (?, ?, ?)", rows)
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        return added
+
+    def lease(self, worker_id, batch_size=1):
+        """
+        Atomically leases up to batch_size visible items for this worker.
+        Visible means pending and not delayed by release(), or leased by
+        someone whose lease has expired. Returns a list of (item_id, payload) tuples.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Items whose final attempt was abandoned by a crashed worker give up here
+            conn.execute("""
+                UPDATE items SET status = 'failed', error = 'lease expired', lease_owner = NULL,
+                                 lease_expires = NULL, updated_at = ?
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """, (now, now, self.max_attempts))
+            rows = conn.execute("""
+                SELECT id, payload FROM items
+                WHERE ((status = 'pending' AND (available_at IS NULL OR available_at <= ?))
+                       OR (status = 'leased' AND lease_expires < ?))
+                  AND attempts < ?
+                ORDER BY id LIMIT ?
+            """, (now, now, self.max_attempts, batch_size)).fetchall()
+            conn.executemany("""
+                UPDATE items SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                                 attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            """, [(worker_id, now + self.visibility_timeout, now, item_id) for item_id, _ in rows])
+            conn.execute("COMMIT")
+        return [(item_id, json.loads(payload)) for item_id, payload in rows]
+
+    def extend_lease(self, item_id, worker_id):
+        """Pushes the lease deadline out again for long-running items."""
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE items SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'
+            """, (time.time() + self.visibility_timeout, item_id, worker_id))
+        return cursor.rowcount == 1
+
+    def complete(self, item_id, worker_id, result=None):
+        """
+        Marks a leased item done and stores its result. Returns False if the
+        lease was lost to another worker in the meantime.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE items SET status = 'done', result = ?, lease_owner = NULL, lease_expires = NULL,
+                                 updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+            """, (json.dumps(result), time.time(), item_id, worker_id))
+        return cursor.rowcount == 1
+
+    def fail(self, item_id, worker_id, error, retry=True):
+        """
+        Releases a leased item after an error. It goes back to pending for a
+        retry until max_attempts is reached, after which it is marked failed.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE items SET status = CASE WHEN ? AND attempts < ? THEN 'pending' ELSE 'failed' END,
+                                 error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+            """, (int(retry), self.max_attempts, str(error), time.time(), item_id, worker_id))
+        return cursor.rowcount == 1
+
+    def release(self, item_id, worker_id, delay=0, reason=None):
+        """
+        Hands a leased item back without using up an attempt, e.g. when the
+        API is rate limiting. It stays invisible to lease() for `delay` seconds.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE items SET status = 'pending', attempts = attempts - 1, error = ?, available_at = ?,
+                                 lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+            """, (reason, now + delay, now, item_id, worker_id))
+        return cursor.rowcount == 1
+
+    def clear(self):
+        """Removes every item, e.g. before starting a new sweep. Returns the number removed."""
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM items")
+        return cursor.rowcount
+
+    def results(self):
+        """Returns (payload, result) pairs for every completed item, in enqueue order."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT payload, result FROM items WHERE status = 'done' ORDER BY id").fetchall()
+        return [(json.loads(payload), json.loads(result)) for payload, result in rows]
+
+    def stats(self):
+        """Counts items by status, e.g. {'pending': 10, 'leased': 2, 'done': 88}."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall()
+        return dict(rows)
+
+    def is_drained(self):
+        """True once no item is pending or leased."""
+        with self._connect() as conn:
+            (remaining,) = conn.execute(
+                "SELECT COUNT(*) FROM items WHERE status IN ('pending', 'leased')"
+            ).fetchone()
+        return remaining == 0
+
+
+def default_worker_id():
+    """A worker id that is unique across processes and hosts."""
+    return f"{socket.gethostname()}-{os.getpid()}"